@@ -1,39 +1,53 @@
+import atexit
+import functools
 import hashlib
+import inspect
 import joblib
+import json
 import math
 import os
+import queue
 import re
 import sqlite3
 import sys
+import threading
+import time
 import traceback
 import warnings
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Any, Optional, Union
+from typing import List, Deque, Dict, Tuple, Any, Optional, Union
 
 # Third-party imports
 import numpy as np
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, g
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, g, has_app_context, has_request_context
 from flask_caching import Cache
-from lime.lime_text import LimeTextExplainer
 from sklearn.base import BaseEstimator, TransformerMixin, ClassifierMixin
 from sklearn.preprocessing import MinMaxScaler
 from werkzeug.security import generate_password_hash, check_password_hash
-from wordfreq import zipf_frequency
-
-# Deep Learning imports
-import torch
-import torch.nn.functional as F
-from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Input, Dense, Dropout, BatchNormalization
+from wordfreq import get_frequency_dict, zipf_frequency
+
+# Local imports
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry
+from model_server import ModelServerClient
+from near_duplicate import INDEX_FILE_PATH as NEARDUP_INDEX_PATH, NearDuplicateIndex
+from rule_engine import RULES_FILE_PATH, RuleEngine
+from scoring_policy import SCORING_POLICY_PATH, ScoringPolicy
 import __main__
 
+# Deep Learning imports (torch, transformers, spacy, lime) are deferred to the
+# model loaders in section 4, so importing this module stays cheap.
+
 # ==========================================
 # 0. CRADLE LOGGING
 # ==========================================
 
-SERVER_LOGS: List[str] = []
+LOG_BUFFER_SIZE = 200
+LOG_FLUSH = os.environ.get("JOBGUARD_LOG_FLUSH", "0") == "1"  # Flush stdout on every entry (unbuffered pipes)
+
+# Ring buffer for the admin log view: appends are atomic and drop the oldest entry in O(1)
+SERVER_LOGS: Deque[str] = deque(maxlen=LOG_BUFFER_SIZE)
 
 def log_debug(message: str, level: str = "INFO") -> None:
     """
@@ -46,9 +60,26 @@ def log_debug(message: str, level: str = "INFO") -> None:
     timestamp = datetime.now().strftime("%H:%M:%S")
     entry = f"[{timestamp}] [{level}] {message}"
     SERVER_LOGS.append(entry)
-    if len(SERVER_LOGS) > 200:
-        SERVER_LOGS.pop(0)
-    print(entry, flush=True)
+    print(entry, flush=LOG_FLUSH)
+
+# --- Metrics (Prometheus text format at /metrics, per worker process) ---
+metrics_registry = Registry()
+STAGE_SECONDS = metrics_registry.histogram(
+    "jobguard_stage_seconds", "Latency of each scoring stage (batched stages observe once per batch).", ["stage"])
+REQUEST_SECONDS = metrics_registry.histogram("jobguard_request_seconds", "HTTP request latency.", ["route"])
+REQUESTS_TOTAL = metrics_registry.counter("jobguard_requests_total", "HTTP requests served.", ["route", "status"])
+REQUESTS_IN_FLIGHT = metrics_registry.gauge("jobguard_requests_in_flight", "HTTP requests being served.", ["route"])
+VERDICTS_TOTAL = metrics_registry.counter("jobguard_verdicts_total", "Analysis results returned, by verdict.", ["verdict"])
+LIME_RUNS_TOTAL = metrics_registry.counter("jobguard_lime_runs_total", "LIME explanations computed (inline or deferred).")
+CACHE_LOOKUPS_TOTAL = metrics_registry.counter("jobguard_cache_lookups_total", "Result cache lookups.", ["result"])
+COALESCED_TOTAL = metrics_registry.counter(
+    "jobguard_coalesced_total", "Requests that shared an identical in-flight analysis instead of running their own.")
+CASCADE_TOTAL = metrics_registry.counter(
+    "jobguard_cascade_total", "Cascade decisions (bert_run or bert_skipped).", ["decision"])
+STAGE_TIMEOUTS_TOTAL = metrics_registry.counter(
+    "jobguard_stage_timeouts_total", "Model stages that missed their deadline (neutral fallback used).", ["stage"])
+HISTORY_ROWS_TOTAL = metrics_registry.counter(
+    "jobguard_scan_history_rows_total", "Scan history rows by outcome (written, dropped or failed).", ["outcome"])
 
 def custom_warning_handler(message: Warning, category: Any, filename: str, lineno: int, file: Optional[Any] = None, line: Optional[str] = None) -> None:
     """
@@ -92,6 +123,62 @@ class TextCleaner(BaseEstimator, TransformerMixin):
             cleaned.append(text)
         return cleaned
 
+# Docs already parsed by a batch stage, shared with SpacyVectorTransformer on the same thread
+_spacy_context = threading.local()
+
+class PerturbationVectorizer:
+    """
+    Doc vectors for a batch of word-dropped variants of one text (LIME perturbations).
+
+    Spacy tokenizes every whitespace-separated chunk on its own, so a doc
+    vector is the sum of its chunks' token vectors divided by its token count.
+    Variants share almost all of their chunks, so each distinct chunk is
+    tokenized once into a row of a (chunks x 300) sum matrix, and the doc
+    vectors of the whole batch are `counts @ sums / tokens`: one matrix
+    multiply instead of one Spacy parse per variant. Texts with whitespace
+    other than single spaces (which Spacy turns into tokens) are parsed normally.
+    """
+    def __init__(self, engine: Any):
+        self.engine = engine
+        self.width = engine.vocab.vectors_length
+        self._chunks: Dict[str, int] = {}
+        self._sums: List[np.ndarray] = []
+        self._lengths: List[int] = []
+
+    def _chunk_id(self, chunk: str) -> int:
+        idx = self._chunks.get(chunk)
+        if idx is None:
+            idx = self._chunks[chunk] = len(self._sums)
+            tokens = self.engine.make_doc(chunk)
+            total = np.zeros(self.width, dtype=np.float32)
+            for token in tokens:
+                total += token.vector
+            self._sums.append(total)
+            self._lengths.append(len(tokens))
+        return idx
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        if not self.width:
+            return np.zeros((len(texts), 300))  # No vector table: no doc has a vector
+
+        rows, cols, reparse = [], [], []
+        for row, text in enumerate(texts):
+            chunks = text.split()
+            if ' '.join(chunks) != text:
+                reparse.append(row)
+                continue
+            for chunk in chunks:
+                rows.append(row)
+                cols.append(self._chunk_id(chunk))
+
+        counts = np.zeros((len(texts), len(self._sums)), dtype=np.float32)
+        np.add.at(counts, (rows, cols), 1)
+        tokens = counts @ np.array(self._lengths, dtype=np.float32)
+        vectors = (counts @ np.array(self._sums).reshape(-1, self.width)) / np.maximum(tokens, 1)[:, None]
+        for row, doc in zip(reparse, self.engine.pipe([texts[r] for r in reparse], batch_size=SPACY_BATCH_SIZE)):
+            vectors[row] = doc.vector if doc.has_vector else 0.0
+        return vectors
+
 class SpacyVectorTransformer(BaseEstimator, TransformerMixin):
     """
     Transforms text into SpaCy word vectors.
@@ -105,21 +192,35 @@ class SpacyVectorTransformer(BaseEstimator, TransformerMixin):
 
     def transform(self, X: List[str]) -> np.ndarray:
         engine = self.nlp if self.nlp else nlp_engine
-        
+
+        # Optimization: Reuse docs handed over by the batched sklearn stage
+        docs = getattr(_spacy_context, 'docs', None)
+        if docs is not None and len(docs) == len(X):
+            return np.array([doc.vector if doc.has_vector else np.zeros(300) for doc in docs])
+
+        # Optimization: LIME variants of one post share nearly all of their chunks
+        if getattr(_spacy_context, 'perturbations', False):
+            return PerturbationVectorizer(engine).transform(X)
+
         # Optimization: Use global request context if available to avoid re-tokenizing
-        if hasattr(g, 'spacy_doc') and g.spacy_doc is not None and len(X) == 1:
+        if has_app_context() and getattr(g, 'spacy_doc', None) is not None and len(X) == 1:
             if g.spacy_doc.has_vector:
                 return np.array([g.spacy_doc.vector])
             return np.array([np.zeros(300)])
             
         vectors = []
-        for doc in engine.pipe(X):
+        for doc in engine.pipe(X, batch_size=SPACY_BATCH_SIZE):
             if doc.has_vector:
                 vectors.append(doc.vector)
             else:
                 vectors.append(np.zeros(300))
         return np.array(vectors)
 
+# Autoencoder serving path: "numpy" runs the forward pass from `ae_weights` directly,
+# "keras" rebuilds the TensorFlow model (only imported in that mode).
+AE_BACKEND = os.environ.get("JOBGUARD_AE_BACKEND", "numpy")
+BN_EPSILON = 1e-3  # Keras BatchNormalization default
+
 class RobustAnomalyDetector(BaseEstimator, ClassifierMixin):
     """
     Detects anomalies using a combination of Isolation Forest and Autoencoder reconstruction error.
@@ -132,8 +233,11 @@ class RobustAnomalyDetector(BaseEstimator, ClassifierMixin):
         self.ae_weights = None
         self.autoencoder = None
     
-    def _build_autoencoder(self) -> tf.keras.Model:
+    def _build_autoencoder(self) -> Any:
         """Constructs the Autoencoder neural network."""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Input, Dense, Dropout, BatchNormalization
+
         model = Sequential([
             Input(shape=(self.input_dim,)),
             Dense(256, activation='relu'),
@@ -148,6 +252,70 @@ class RobustAnomalyDetector(BaseEstimator, ClassifierMixin):
         model.compile(optimizer='adam', loss='mse')
         return model
 
+    def _numpy_params(self) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], np.ndarray, np.ndarray]:
+        """
+        Unpacks `ae_weights` (Keras `get_weights()` order) into Dense kernels/biases
+        and folds the BatchNormalization statistics into a single scale and shift.
+        """
+        params = getattr(self, '_np_params', None)
+        if params is None:
+            w = [np.asarray(a, dtype=np.float32) for a in self.ae_weights]
+            gamma, beta, moving_mean, moving_var = w[2:6]
+            bn_scale = gamma / np.sqrt(moving_var + BN_EPSILON)
+            bn_shift = beta - moving_mean * bn_scale
+            dense = [(w[0], w[1])] + [(w[i], w[i + 1]) for i in range(6, len(w), 2)]
+            params = (dense, bn_scale, bn_shift)
+            self._np_params = params
+        return params
+
+    def reconstruct(self, input_scaled: np.ndarray) -> np.ndarray:
+        """
+        Runs the Autoencoder forward pass (inference mode) in vectorized NumPy.
+
+        Args:
+            input_scaled (np.ndarray): Scaled feature rows of shape (n_samples, input_dim).
+
+        Returns:
+            np.ndarray: Reconstructed rows (float32), same shape as the input.
+        """
+        if AE_BACKEND == "keras":
+            if self.autoencoder is None:
+                self.autoencoder = self._build_autoencoder()
+                if self.ae_weights:
+                    self.autoencoder.set_weights(self.ae_weights)
+            return self.autoencoder.predict(input_scaled, verbose=0)
+
+        dense, bn_scale, bn_shift = self._numpy_params()
+        h = np.asarray(input_scaled, dtype=np.float32)
+
+        # Dense(256, relu) -> BatchNormalization -> Dropout (no-op at inference)
+        kernel, bias = dense[0]
+        h = np.maximum(h @ kernel + bias, 0.0)
+        h = h * bn_scale + bn_shift
+
+        # Dense 128 -> 32 -> 128 -> 256 (relu), then the linear output layer
+        for kernel, bias in dense[1:-1]:
+            h = np.maximum(h @ kernel + bias, 0.0)
+        kernel, bias = dense[-1]
+        return h @ kernel + bias
+
+    def check_backend_parity(self, input_scaled: np.ndarray, atol: float = 1e-4) -> Tuple[bool, float]:
+        """
+        Compares the NumPy forward pass against the Keras model (requires TensorFlow).
+
+        Args:
+            input_scaled (np.ndarray): Scaled feature rows to reconstruct.
+            atol (float): Maximum allowed absolute difference.
+
+        Returns:
+            Tuple[bool, float]: (Within_Tolerance, Max_Absolute_Difference)
+        """
+        keras_model = self._build_autoencoder()
+        keras_model.set_weights(self.ae_weights)
+        expected = keras_model.predict(input_scaled, verbose=0)
+        max_diff = float(np.max(np.abs(self.reconstruct(input_scaled) - expected)))
+        return max_diff <= atol, max_diff
+
     def predict_with_explanation(self, vector_and_features: np.ndarray) -> List[str]:
         """
         Predicts anomalies and returns a list of explanatory strings.
@@ -158,81 +326,153 @@ class RobustAnomalyDetector(BaseEstimator, ClassifierMixin):
         Returns:
             List[str]: Explanations for any detected anomalies.
         """
-        if self.autoencoder is None:
-            self.autoencoder = self._build_autoencoder()
-            if self.ae_weights:
-                self.autoencoder.set_weights(self.ae_weights)
+        return self.predict_batch_with_explanation(vector_and_features.reshape(1, -1))[0]
 
-        input_data = vector_and_features.reshape(1, -1)
-        input_scaled = self.scaler.transform(input_data)
-        
-        iso_pred = self.iso_model.predict(input_scaled)[0]
-        recon = self.autoencoder.predict(input_scaled, verbose=0)
-        loss = tf.keras.losses.mse(recon, input_scaled).numpy()[0]
-        
-        explanations = []
-        if iso_pred == -1:
-            explanations.append("Statistical Structural Outlier")
-        if loss > self.ae_threshold:
-            explanations.append(f"Deep Pattern Anomaly (MSE: {loss:.4f})")
-            
-        return explanations
+    def predict_batch_with_explanation(self, matrix: np.ndarray) -> List[List[str]]:
+        """
+        Batched variant of `predict_with_explanation`. Scores every row with a
+        single Isolation Forest and Autoencoder call.
+
+        Args:
+            matrix (np.ndarray): Feature rows of shape (n_samples, input_dim).
+
+        Returns:
+            List[List[str]]: Explanations for each row, in input order.
+        """
+        input_scaled = self.scaler.transform(matrix)
+
+        iso_preds = self.iso_model.predict(input_scaled)
+        if self.ae_weights or AE_BACKEND == "keras":
+            recon = self.reconstruct(input_scaled)
+            losses = np.mean(np.square(recon - input_scaled.astype(np.float32)), axis=-1)
+        else:
+            losses = np.zeros(len(input_scaled))  # No trained Autoencoder to compare against
+
+        results = []
+        for iso_pred, loss in zip(iso_preds, losses):
+            explanations = []
+            if iso_pred == -1:
+                explanations.append("Statistical Structural Outlier")
+            if loss > self.ae_threshold:
+                explanations.append(f"Deep Pattern Anomaly (MSE: {loss:.4f})")
+            results.append(explanations)
+
+        return results
 
 # Inject classes into __main__ so pickle can find them
 __main__.TextCleaner = TextCleaner
 __main__.SpacyVectorTransformer = SpacyVectorTransformer
 __main__.RobustAnomalyDetector = RobustAnomalyDetector
 
+class TorchBertBackend:
+    """
+    Eager PyTorch inference for the DistilBERT classifier. With `quantize`,
+    the Linear layers are converted to dynamic INT8.
+    """
+    def __init__(self, model: Any, quantize: bool = False):
+        import torch
+
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.name = "int8" if quantize else "torch"
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        """Runs one forward pass over tokenizer output (numpy arrays)."""
+        import torch
+
+        with torch.no_grad():
+            return self.model(**{k: torch.from_numpy(v) for k, v in encoded.items()}).logits.numpy()
+
+class OnnxBertBackend:
+    """
+    ONNX Runtime inference for the DistilBERT classifier. The model is exported
+    to `path` on first use; with `quantize`, a dynamic INT8 copy is built next to it.
+    `path` names the weights it belongs to (`onnx_export_path`); exports of
+    other weights are removed once a new one is written.
+    """
+    def __init__(self, model: Any, tokenizer: Any, path: str, quantize: bool = False):
+        import onnxruntime as ort
+
+        if not os.path.exists(path):
+            self.export(model, tokenizer, path)
+            self.remove_stale_exports(path)
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            int8_path = path.replace(".onnx", ".int8.onnx")
+            if not os.path.exists(int8_path):
+                quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+            path = int8_path
+
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.name = "onnx-int8" if quantize else "onnx"
+
+    @staticmethod
+    def remove_stale_exports(path: str) -> None:
+        """Deletes exports (and INT8 copies) of previous weights next to `path`."""
+        directory = os.path.dirname(path) or "."
+        prefix = os.path.basename(path).split(".", 1)[0] + "."
+        keep = {os.path.basename(path), os.path.basename(path).replace(".onnx", ".int8.onnx")}
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(".onnx") and name not in keep:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def export(model: Any, tokenizer: Any, path: str) -> None:
+        """Exports the PyTorch model to ONNX with dynamic batch and sequence axes."""
+        import torch
+
+        sample = tokenizer("export sample", return_tensors="pt")
+        # Prefer the TorchScript exporter where available: its graph keeps fully
+        # dynamic shapes, which the INT8 quantizer's shape inference relies on.
+        legacy = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask']),
+            path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=17,
+            **legacy
+        )
+        log_debug(f"✅ BERT exported to {path}", "SUCCESS")
+
+    def logits(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        """Runs one forward pass over tokenizer output (numpy arrays)."""
+        feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+        return self.session.run(['logits'], feeds)[0]
+
 # ==========================================
 # 3. HEURISTIC & VALIDATION ENGINE
 # ==========================================
 
+rule_engine = RuleEngine(RULES_FILE_PATH, log=log_debug)
+scoring_policy = ScoringPolicy.load(SCORING_POLICY_PATH, log=log_debug)
+
+@STAGE_SECONDS.timed(stage="heuristics")
 def heuristic_analysis(text: str) -> List[str]:
     """
-    Scans text for known fraud patterns using regex.
+    Scans text for known fraud patterns (behavioural regexes + trigger keywords)
+    with the `heuristics` rule set of the rules file.
     """
-    text_lower = text.lower()
-    warnings_list = []
-    
-    behavioral_patterns = [
-        (r"(validate|verify).{0,20}(bank|account|wallet)", "🎣 **Phishing:** Request to validate financial info."),
-        (r"(click|follow).{0,20}(link|url).{0,20}(verify|update)", "🎣 **Phishing:** 'Click link to verify' pattern."),
-        (r"(processing|training).{0,10}(fee|charge|cost)", "💸 **Financial:** Illegal demand for fees."),
-        (r"(no).{0,10}(interview).{0,20}(direct)", "⚠️ **Red Flag:** Direct hire / No interview.")
-    ]
-    for pattern, msg in behavioral_patterns:
-        if re.search(pattern, text_lower):
-            warnings_list.append(msg)
-
-    triggers = {
-        "telegram": "🚨 **Platform:** Telegram contact.",
-        "signal": "🚨 **Platform:** Signal (Encrypted) contact.",
-        "whatsapp": "🚨 **Platform:** WhatsApp contact.",
-        "usdt": "🚨 **Crypto:** USDT payment mentioned.",
-        "bitcoin": "🚨 **Crypto:** Bitcoin payment mentioned.",
-        "anydesk": "⚠️ **Security:** Remote Access Tool (AnyDesk)."
-    }
-    for word, msg in triggers.items():
-        if word in text_lower:
-            warnings_list.append(msg)
-            
-    return warnings_list
+    return rule_engine.evaluate('heuristics', text)
 
+@STAGE_SECONDS.timed(stage="metadata")
 def metadata_check(text: str) -> List[str]:
     """
-    Checks for missing professional metadata (salary, company name, etc.).
+    Checks for missing professional metadata (salary, company name, etc.)
+    with the `metadata` rule set of the rules file.
     """
-    advisory = []
-    text_low = text.lower()
-    
-    if "@gmail.com" in text_low or "@yahoo.com" in text_low: 
-        advisory.append("ℹ️ **Identity:** Personal email domain used.")
-    if "salary" not in text_low and "$" not in text and "lpa" not in text_low: 
-        advisory.append("ℹ️ **Clarity:** Missing salary details.")
-    if "linkedin" not in text_low and "company" not in text_low: 
-        advisory.append("ℹ️ **Verification:** No company/social links.")
-        
-    return advisory
+    return rule_engine.evaluate('metadata', text)
 
 def extract_structural_features(text: str) -> List[float]:
     """
@@ -256,6 +496,121 @@ def extract_structural_features(text: str) -> List[float]:
         float(word_count)
     ]
 
+# Per-character classes, derived from the same predicates the scalar extractor
+# uses (str.isupper / str.isdigit / the `specials` regex / str.split)
+_STRUCTURAL_SPECIAL = re.compile(r'[^a-zA-Z0-9\s]')
+
+def _char_classes(chars: List[str]) -> np.ndarray:
+    """(4, len(chars)) bool table of [upper, digit, special, space] per character."""
+    return np.array([
+        [c.isupper() for c in chars],
+        [c.isdigit() for c in chars],
+        [_STRUCTURAL_SPECIAL.match(c) is not None for c in chars],
+        [c.isspace() for c in chars],
+    ], dtype=bool).reshape(4, len(chars))
+
+# In ASCII the four classes are disjoint, so one byte per character encodes them
+# (0 = none, 1 = upper, 2 = digit, 3 = special, 4 = space) via bytes.translate.
+_ASCII_CLASSES = _char_classes([chr(i) for i in range(128)])
+_ASCII_CLASS_BYTES = bytes((_ASCII_CLASSES * np.arange(1, 5)[:, None]).sum(axis=0).tolist() + [0] * 128)
+
+def extract_structural_features_batch(texts: List[str], dtype: Any = np.float32) -> np.ndarray:
+    """
+    Vectorized `extract_structural_features` for many texts.
+
+    The texts are joined with '\n' into one buffer; ASCII input is classified
+    with a single `bytes.translate` into a uint8 view, anything else through a
+    uint32 code-point view (each distinct non-ASCII character is classified
+    once). Per-text counts are segment sums over that buffer, so every row
+    matches the scalar extractor exactly.
+
+    Args:
+        texts (List[str]): The postings.
+        dtype: Output dtype; float64 reproduces the scalar values bit for bit.
+
+    Returns:
+        np.ndarray: (N, 7) feature matrix.
+    """
+    texts = [str(t) for t in texts]
+    features = np.zeros((len(texts), 7), dtype=np.float64)
+    if not texts:
+        return features.astype(dtype, copy=False)
+
+    lengths = np.array([len(t) for t in texts], dtype=np.int64)
+    # Every segment is text + '\n', so none is empty (reduceat needs that) and the
+    # separator adds nothing but a space.
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    joined = "\n".join(texts) + "\n"
+    if joined.isascii():
+        classes = np.frombuffer(joined.encode('ascii').translate(_ASCII_CLASS_BYTES), dtype=np.uint8)
+        upper, digit, special, space = (classes == k for k in range(1, 5))
+    else:
+        codes = np.frombuffer(joined.encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32)
+        table = np.empty((4, len(codes)), dtype=bool)
+        is_ascii = codes < 128
+        table[:, is_ascii] = _ASCII_CLASSES[:, codes[is_ascii]]
+        distinct, inverse = np.unique(codes[~is_ascii], return_inverse=True)
+        table[:, ~is_ascii] = _char_classes([chr(c) for c in distinct.tolist()])[:, inverse.ravel()]
+        upper, digit, special, space = table
+
+    # A word starts at a non-space character after a space (the '\n' joins count as spaces)
+    word_start = ~space
+    word_start[1:] &= space[:-1]
+
+    def per_text(mask: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(mask, starts, dtype=np.int64)
+
+    denom = np.maximum(lengths, 1)
+    features[:, 0] = per_text(upper) / denom
+    features[:, 1] = per_text(digit) / denom
+    features[:, 2] = per_text(special) / denom
+    features[:, 3] = [1.0 if "@" in t else 0.0 for t in texts]
+    features[:, 5] = [1.0 if "http" in t else 0.0 for t in texts]
+    features[:, 6] = per_text(word_start)
+    return features.astype(dtype, copy=False)
+
+class VocabularyIndex:
+    """
+    In-memory index of the known English words (wordfreq's `en` list), loaded
+    once per process. Membership matches `zipf_frequency(word, 'en') > 0.0`:
+    ASCII tokens are answered from a frozenset, anything else defers to wordfreq.
+    Full per-token verdicts (including the compound split) are memoized.
+    """
+    def __init__(self, lang: str = 'en', memo_size: int = 65536):
+        self.lang = lang
+        self._words: Optional[frozenset] = None
+        self._lock = threading.Lock()
+        self.is_unknown = functools.lru_cache(maxsize=memo_size)(self._is_unknown)
+
+    @property
+    def words(self) -> frozenset:
+        if self._words is None:
+            with self._lock:
+                if self._words is None:
+                    self._words = frozenset(get_frequency_dict(self.lang, wordlist='best'))
+        return self._words
+
+    def is_known(self, word: str) -> bool:
+        """Dictionary existence check for a lowercased token."""
+        if word.isascii():
+            return word in self.words
+        return zipf_frequency(word, self.lang) > 0.0
+
+    def _is_unknown(self, lower_token: str) -> bool:
+        # Check dictionary existence
+        if self.is_known(lower_token):
+            return False
+
+        # Check compound words (suffix only looked up once the prefix is a word)
+        if len(lower_token) > 6:
+            for i in range(3, len(lower_token) - 2):
+                if self.is_known(lower_token[:i]) and self.is_known(lower_token[i:]):
+                    return False
+        return True
+
+english_vocab = VocabularyIndex()
+
+@STAGE_SECONDS.timed(stage="language")
 def detect_invalid_language(text: str) -> Tuple[bool, List[str]]:
     """
     Detects gibberish, code snippets, or non-English text.
@@ -287,46 +642,23 @@ def detect_invalid_language(text: str) -> Tuple[bool, List[str]]:
         issues.append("Language Error: Programming Code Detected")
         return True, issues
 
-    # Check 4: Gibberish (Zipf Frequency)
-    tokens = [t for t in text.split() if t.isalpha()]
-    if not tokens:
-        return False, [] 
-    
-    unknown_word_count = 0
-    total_checked = 0
-    
-    for token in tokens:
-        if len(token) < 4:
-            continue 
-        total_checked += 1
-        lower_token = token.lower()
-        
-        # Check dictionary existence
-        if zipf_frequency(lower_token, 'en') > 0.0:
-            continue 
-            
-        # Check compound words
-        is_compound = False
-        if len(lower_token) > 6: 
-            for i in range(3, len(lower_token) - 2): 
-                part1 = lower_token[:i]
-                part2 = lower_token[i:]
-                if zipf_frequency(part1, 'en') > 0.0 and zipf_frequency(part2, 'en') > 0.0:
-                    is_compound = True
-                    break
-        
-        if is_compound:
-            continue
-        unknown_word_count += 1
+    # Check 4: Gibberish (Zipf Frequency, via the precomputed vocabulary index)
+    checked = [t.lower() for t in text.split() if t.isalpha() and len(t) >= 4]
+    if not checked:
+        return False, []
 
-    if total_checked > 0:
-        gibberish_ratio = unknown_word_count / total_checked
-        if gibberish_ratio > 0.5:
-            issues.append(f"Language Error: Gibberish Detected ({int(gibberish_ratio*100)}% unknown)")
-            return True, issues
+    unknown_word_count = sum(1 for token in checked if english_vocab.is_unknown(token))
+    gibberish_ratio = unknown_word_count / len(checked)
+    if gibberish_ratio > 0.5:
+        issues.append(f"Language Error: Gibberish Detected ({int(gibberish_ratio*100)}% unknown)")
+        return True, issues
 
     return False, []
 
+def detect_invalid_language_batch(texts: List[str]) -> List[Tuple[bool, List[str]]]:
+    """Runs `detect_invalid_language` over many texts, sharing the per-token memo."""
+    return [detect_invalid_language(text) for text in texts]
+
 # ==========================================
 # 4. APP & MODEL LOADING
 # ==========================================
@@ -335,22 +667,302 @@ app = Flask(__name__)
 app.secret_key = "jobguard_production_key"
 app.permanent_session_lifetime = timedelta(days=30)
 DB_NAME = "users.db"
-cache = Cache(app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 3600})
 
-# --- Load SpaCy ---
+# --- User Database Configuration ---
+# Password hashes run on a small dedicated pool so a burst of logins cannot take
+# every core away from inference. Scan history is written behind the request: rows
+# are queued and flushed in one transaction per batch (or per interval).
+AUTH_HASH_WORKERS = int(os.environ.get("JOBGUARD_AUTH_HASH_WORKERS", "2"))
+HISTORY_ENABLED = os.environ.get("JOBGUARD_SCAN_HISTORY", "1") == "1"
+HISTORY_BATCH_SIZE = int(os.environ.get("JOBGUARD_HISTORY_BATCH_SIZE", "200"))
+HISTORY_FLUSH_SECONDS = float(os.environ.get("JOBGUARD_HISTORY_FLUSH_SECONDS", "1.0"))
+HISTORY_QUEUE_SIZE = int(os.environ.get("JOBGUARD_HISTORY_QUEUE_SIZE", "10000"))  # Full queue drops rows, never blocks
+HISTORY_PAGE_SIZE = 50
+
+# --- Result Cache Configuration ---
+# "sqlite" shares one WAL database between all workers on the host and survives
+# restarts; "simple" is the old per-process in-memory cache; "null" disables caching
+# (benchmarks).
+CACHE_BACKEND = os.environ.get("JOBGUARD_CACHE_BACKEND", "sqlite")
+CACHE_TYPES = {"sqlite": "result_cache.SQLiteCache", "simple": "SimpleCache", "null": "NullCache"}
+CACHE_PATH = os.environ.get("JOBGUARD_CACHE_PATH", "result_cache.db")
+CACHE_MAX_ENTRIES = int(os.environ.get("JOBGUARD_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL = int(os.environ.get("JOBGUARD_CACHE_TTL", "3600"))
+# Concurrent misses for the same cache key wait for the first one's result instead
+# of running the models again (per worker process)
+COALESCE_ENABLED = os.environ.get("JOBGUARD_COALESCE", "1") == "1"
+cache = Cache(app, config={
+    "CACHE_TYPE": CACHE_TYPES.get(CACHE_BACKEND, "SimpleCache"),
+    "CACHE_DEFAULT_TIMEOUT": CACHE_TTL,
+    "CACHE_THRESHOLD": CACHE_MAX_ENTRIES,
+    "CACHE_SQLITE_PATH": CACHE_PATH,
+})
+
+# --- Near-Duplicate (Known Campaign) Configuration ---
+# Reposts within NEARDUP_FLAG_THRESHOLD (estimated Jaccard) of a posting previously
+# scored Fake are flagged as a known campaign. At NEARDUP_SHORT_CIRCUIT and above the
+# prior verdict is returned without running the models (0 disables short-circuiting).
+NEARDUP_PATH = os.environ.get("JOBGUARD_NEARDUP_PATH", NEARDUP_INDEX_PATH)
+NEARDUP_FLAG_THRESHOLD = float(os.environ.get("JOBGUARD_NEARDUP_FLAG", "0.8"))
+NEARDUP_SHORT_CIRCUIT = float(os.environ.get("JOBGUARD_NEARDUP_SHORT_CIRCUIT", "0"))
+NEARDUP_LEARN = os.environ.get("JOBGUARD_NEARDUP_LEARN", "1") == "1"  # Index newly scored postings
+NEARDUP_SAVE_EVERY = int(os.environ.get("JOBGUARD_NEARDUP_SAVE_EVERY", "0"))  # 0 = never write back
+NEARDUP_MAX_ENTRIES = int(os.environ.get("JOBGUARD_NEARDUP_MAX_ENTRIES", "20000"))  # Oldest evicted first; 0 = unbounded
+
+def load_near_duplicate_index() -> NearDuplicateIndex:
+    """Loads the persisted index (built by `python near_duplicate.py build`), or starts empty."""
+    if os.path.exists(NEARDUP_PATH):
+        try:
+            index = NearDuplicateIndex.load(NEARDUP_PATH, NEARDUP_MAX_ENTRIES)
+            log_debug(f"✅ Near-duplicate index loaded ({len(index)} postings)", "SUCCESS")
+            return index
+        except Exception as e:
+            log_debug(f"⚠️ Near-duplicate index unreadable, starting empty: {e}", "WARN")
+    return NearDuplicateIndex(max_entries=NEARDUP_MAX_ENTRIES)
+
+near_duplicate_index = load_near_duplicate_index()
+
+# --- Batching Configuration ---
+MICRO_BATCHING = os.environ.get("JOBGUARD_MICRO_BATCHING", "1") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("JOBGUARD_BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("JOBGUARD_BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_POSTINGS = int(os.environ.get("JOBGUARD_BATCH_MAX_POSTINGS", "256"))
+
+# --- Stage Concurrency Configuration ---
+# BERT, Sklearn and the anomaly detector run concurrently in /predict. A stage that
+# misses its deadline (ms from submission; 0 = wait indefinitely) falls back to the
+# neutral score and is listed in the response's `timed_out_stages`.
+STAGE_WORKERS = int(os.environ.get("JOBGUARD_STAGE_WORKERS", "4"))  # Used when micro-batching is off
+STAGE_TIMEOUT_MS = float(os.environ.get("JOBGUARD_STAGE_TIMEOUT_MS", "0"))
+STAGE_TIMEOUTS_MS = {
+    name: float(os.environ.get(f"JOBGUARD_{name.upper()}_TIMEOUT_MS", STAGE_TIMEOUT_MS))
+    for name in ("bert", "sklearn", "anomaly")
+}
+
+# --- Cascade Configuration ---
+# Opt-in: Sklearn, the heuristic rules and the anomaly detector run first, and BERT
+# is only called when they leave the verdict open (see `cascade_needs_bert`). A
+# skipped BERT score takes the Sklearn score. `python parity_check.py --check cascade`
+# replays results.csv against the full ensemble.
+CASCADE_ENABLED = os.environ.get("JOBGUARD_CASCADE", "0") == "1"
+CASCADE_LOW = float(os.environ.get("JOBGUARD_CASCADE_LOW", "0.15"))
+CASCADE_HIGH = float(os.environ.get("JOBGUARD_CASCADE_HIGH", "0.90"))
+
+# --- Deferred XAI Configuration ---
+DEFER_XAI = os.environ.get("JOBGUARD_DEFER_XAI", "0") == "1"  # Default when the request doesn't say
+XAI_WORKERS = int(os.environ.get("JOBGUARD_XAI_WORKERS", "2"))
+XAI_JOB_LIMIT = int(os.environ.get("JOBGUARD_XAI_JOB_LIMIT", "1000"))
+XAI_STREAM_TIMEOUT = float(os.environ.get("JOBGUARD_XAI_STREAM_TIMEOUT", "60"))
+XAI_STREAM_POLL_SECONDS = 1.0  # Cache polling interval for jobs running in another worker
+LIME_NUM_SAMPLES = 100  # Perturbations scored per explanation
+LIME_MASKED_VECTORS = os.environ.get("JOBGUARD_LIME_MASKED_VECTORS", "1") == "1"  # Masked-mean vectors for perturbations
+
+# --- Model Loading Configuration ---
+# "background": load in threads at startup, "lazy": on the first request, "blocking": before import returns,
+# "preload": before import returns but without warm-up, for `gunicorn --preload` (workers warm up after the fork)
+MODEL_LOAD_MODE = os.environ.get("JOBGUARD_LOAD_MODE", "background")
+# Memory-map the weight files read-only (copy-on-write), so their pages live in the page
+# cache and are shared by every worker instead of being copied into each one's heap
+MMAP_WEIGHTS = os.environ.get("JOBGUARD_MMAP_WEIGHTS", "1" if MODEL_LOAD_MODE == "preload" else "0") == "1"
+MODEL_LOAD_TIMEOUT = float(os.environ.get("JOBGUARD_MODEL_LOAD_TIMEOUT", "300"))
+# Requests never wait for the models: they get a 503 with this Retry-After (seconds) until loading finishes
+MODEL_LOADING_RETRY_AFTER = int(os.environ.get("JOBGUARD_MODEL_LOADING_RETRY_AFTER", "5"))
+WARMUP_ENABLED = os.environ.get("JOBGUARD_WARMUP", "1") == "1"
+# Unix socket of a `python model_server.py serve` process. When set, this worker loads
+# no models: BERT, Sklearn, the anomaly detector (and their Spacy parsing) run there.
+MODEL_SERVER_SOCKET = os.environ.get("JOBGUARD_MODEL_SERVER", "")
+
 nlp_engine = None
-try:
-    import spacy
-    nlp_engine = spacy.load("en_core_web_lg")
-    log_debug("✅ Spacy Loaded", "SUCCESS")
-except Exception as e:
+sklearn_pipeline = None
+bert_tokenizer = None
+bert_model = None
+bert_backend = None
+anomaly_model = None
+explainer = None
+model_server: Optional[ModelServerClient] = None
+
+# --- Spacy Configuration ---
+# A package name, or a compact table built by `python compact_vectors.py build` (pruned, float16)
+SPACY_MODEL = os.environ.get("JOBGUARD_SPACY_MODEL", "en_core_web_lg")
+SPACY_MMAP_VECTORS = os.environ.get("JOBGUARD_SPACY_MMAP_VECTORS", "0") == "1"  # Page-cache backed, shared by workers
+SPACY_VECTORS_ONLY = os.environ.get("JOBGUARD_SPACY_VECTORS_ONLY", "1") == "1"
+SPACY_BATCH_SIZE = int(os.environ.get("JOBGUARD_SPACY_BATCH_SIZE", "256"))
+SPACY_N_PROCESS = int(os.environ.get("JOBGUARD_SPACY_N_PROCESS", "1"))  # >1 only pays off for large batches
+SPACY_MP_MIN_TEXTS = int(os.environ.get("JOBGUARD_SPACY_MP_MIN_TEXTS", "1000"))
+SPACY_SCORING_UNUSED = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+BERT_PATH = "." 
+BERT_BACKEND = os.environ.get("JOBGUARD_BERT_BACKEND", "torch")
+BERT_ONNX_PATH = "model.onnx"  # Exported as model.<weights fingerprint>.onnx (see onnx_export_path)
+BERT_MAX_LENGTH = 512
+
+# --- Long Posting Configuration ---
+# With chunking, postings longer than BERT_MAX_LENGTH tokens are scored as overlapping
+# windows (BERT_STRIDE shared tokens) and the window scores are merged by BERT_REDUCER.
+BERT_CHUNKING = os.environ.get("JOBGUARD_BERT_CHUNKING", "0") == "1"
+BERT_STRIDE = int(os.environ.get("JOBGUARD_BERT_STRIDE", "128"))
+BERT_REDUCER = os.environ.get("JOBGUARD_BERT_REDUCER", "max")
+
+# --- Cache Namespace ---
+def model_fingerprint() -> str:
+    """
+    Identifies the model files and scoring settings that produced a result, so
+    cached verdicts are never served across a model swap. Uses file size and
+    mtime (hashing ~260MB of weights per boot would defeat the purpose).
+    """
+    files = [os.path.join(BERT_PATH, "config.json"), os.path.join(BERT_PATH, "model.safetensors"),
+             'production_fake_job_pipeline.pkl', 'robust_anomaly_model.pkl']
+    parts = [BERT_BACKEND, str(BERT_CHUNKING), str(BERT_STRIDE), BERT_REDUCER, AE_BACKEND, SPACY_MODEL]
+    for path in files:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:12]
+
+MODEL_FINGERPRINT = model_fingerprint()
+
+def onnx_export_path(base: str = BERT_ONNX_PATH) -> str:
+    """
+    ONNX export path tied to the BERT weights it was exported from
+    (`model.<fingerprint>.onnx`), so replacing the weights triggers a fresh
+    export instead of silently serving the old model.
+    """
+    parts = []
+    for name in ("config.json", "model.safetensors", "pytorch_model.bin"):
+        try:
+            stat = os.stat(os.path.join(BERT_PATH, name))
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:missing")
+    fingerprint = hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()[:12]
+    root, ext = os.path.splitext(base)
+    return f"{root}.{fingerprint}{ext}"
+
+def result_cache_key(text: str) -> str:
+    """
+    Cache key (and deferred-XAI job id) of a posting: the md5 of the lowercased
+    text with whitespace runs collapsed, namespaced by the model fingerprint
+    and the rules file version.
+    """
+    normalized = " ".join(text.lower().split())
+    namespace = hashlib.sha1(f"{MODEL_FINGERPRINT}|{rule_engine.fingerprint}|{scoring_policy.fingerprint}".encode('utf-8')).hexdigest()[:12]
+    return f"{hashlib.md5(normalized.encode('utf-8')).hexdigest()}-{namespace}"
+
+def cache_lookup(key: str) -> Optional[Dict[str, Any]]:
+    """Reads a cached result and counts the hit/miss. Returns a copy callers may modify."""
+    cached = cache.get(key)
+    CACHE_LOOKUPS_TOTAL.inc(result="hit" if cached else "miss")
+    return dict(cached) if cached else None
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of this worker's result-cache lookups."""
+    hits, misses = int(CACHE_LOOKUPS_TOTAL.value(result="hit")), int(CACHE_LOOKUPS_TOTAL.value(result="miss"))
+    return {'backend': CACHE_BACKEND, 'model_fingerprint': MODEL_FINGERPRINT, 'hits': hits, 'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+            'coalesced': int(COALESCED_TOTAL.value()), 'in_flight': inflight_predictions.in_flight()}
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller
+    runs the computation, later callers wait on its Future and share the
+    result (or the exception). A key is forgotten as soon as its call finishes,
+    by which time the result is in the cache.
+    """
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, fn: Any) -> Tuple[Any, bool]:
+        """Returns `fn()` (or the in-flight call's result) and whether it was shared."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            COALESCED_TOTAL.inc()
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result(), False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+inflight_predictions = SingleFlight()
+
+# Per-model load state ("pending", "loading", "ready", "degraded", "missing", "failed") and timings
+MODEL_STATUS: Dict[str, Dict[str, Any]] = {
+    name: {'state': "pending", 'seconds': None, 'error': None}
+    for name in ("spacy", "sklearn", "bert", "anomaly", "explainer", "warmup")
+}
+_models_ready = threading.Event()
+_loading_lock = threading.Lock()
+_loading_started = False
+
+# --- Load SpaCy ---
+def load_spacy() -> str:
+    """
+    Loads SPACY_MODEL, falling back to a blank English pipeline. In
+    vectors-only mode the trained components are excluded, so docs come from
+    the tokenizer plus the static vector table (the only parts scoring uses);
+    `doc.vector` is unchanged because the model's static vectors take
+    precedence over component tensors.
+    """
+    global nlp_engine
     import spacy
-    nlp_engine = spacy.blank("en")
-    log_debug(f"⚠️ Spacy Failed. Using Blank. {e}", "WARN")
+    try:
+        if SPACY_VECTORS_ONLY:
+            nlp = spacy.load(SPACY_MODEL, exclude=SPACY_SCORING_UNUSED)
+            nlp.select_pipes(disable=nlp.pipe_names)  # Anything the exclude list didn't know about
+        else:
+            nlp = spacy.load(SPACY_MODEL)
+        prepare_vector_table(nlp)
+        nlp_engine = nlp
+        log_debug(f"✅ Spacy Loaded ({'vectors only' if SPACY_VECTORS_ONLY else 'full pipeline'})", "SUCCESS")
+        return "ready"
+    except Exception as e:
+        nlp_engine = spacy.blank("en")
+        log_debug(f"⚠️ Spacy Failed. Using Blank. {e}", "WARN")
+        return "degraded"
 
-# --- Load Sklearn Pipeline ---
-sklearn_pipeline = None
+def _doc_vector_f32(doc: Any) -> Any:
+    """Pipeline component: averages the token vectors in float32 (Doc.vector would sum a float16 table in float16)."""
+    if len(doc):
+        doc.vector = np.sum([token.vector for token in doc], axis=0, dtype=np.float32) / len(doc)
+    return doc
 
+def prepare_vector_table(nlp: Any) -> None:
+    """
+    Optionally swaps the loaded vector table for a read-only memory map of the
+    same file, and keeps doc vectors float32 when the table is float16.
+    """
+    from spacy.language import Language
+
+    vectors = nlp.vocab.vectors
+    table = os.path.join(str(getattr(nlp, '_path', '') or ''), "vocab", "vectors")
+    if SPACY_MMAP_VECTORS and os.path.exists(table):
+        vectors.data = np.load(table, mmap_mode='r')
+    elif SPACY_MMAP_VECTORS:
+        log_debug("⚠️ Spacy vector table not found on disk, not memory-mapped", "WARN")
+
+    if vectors.data.dtype != np.float32 and vectors.size:
+        if not Language.has_factory("jobguard_doc_vector_f32"):
+            Language.component("jobguard_doc_vector_f32", func=_doc_vector_f32)
+        nlp.add_pipe("jobguard_doc_vector_f32", last=True)
+    log_debug(f"Spacy Vectors: {vectors.shape[0]} x {vectors.shape[1]} {vectors.data.dtype} "
+              f"({vectors.data.nbytes / 2**20:.0f} MB{', mapped' if isinstance(vectors.data, np.memmap) else ''})", "INFO")
+
+# --- Load Sklearn Pipeline ---
 def force_inject_spacy(estimator: Any, nlp_engine: Any) -> None:
     """Recursively injects the live Spacy engine into the pipeline."""
     if isinstance(estimator, SpacyVectorTransformer):
@@ -362,123 +974,934 @@ def force_inject_spacy(estimator: Any, nlp_engine: Any) -> None:
         for _, trans in estimator.transformer_list:
             force_inject_spacy(trans, nlp_engine)
 
-if os.path.exists('production_fake_job_pipeline.pkl'):
+def load_sklearn(spacy_loaded: Future) -> str:
+    """Unpickles the sklearn pipeline, then injects Spacy once it has finished loading."""
+    global sklearn_pipeline
+    if not os.path.exists('production_fake_job_pipeline.pkl'):
+        return "missing"
     try:
-        sklearn_pipeline = joblib.load('production_fake_job_pipeline.pkl')
-        force_inject_spacy(sklearn_pipeline, nlp_engine)
+        pipeline = joblib.load('production_fake_job_pipeline.pkl', mmap_mode='r' if MMAP_WEIGHTS else None)
+        spacy_loaded.result()
+        force_inject_spacy(pipeline, nlp_engine)
+        sklearn_pipeline = pipeline
         log_debug("✅ Sklearn Pipeline Loaded", "SUCCESS")
+        return "ready"
     except Exception as e:
         log_debug(f"❌ Sklearn Load Failed: {e}", "ERROR")
+        raise
 
 # --- Load BERT Model ---
-bert_tokenizer = None
-bert_model = None
-BERT_PATH = "." 
+SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
 
-if os.path.exists("model.safetensors") or os.path.exists("pytorch_model.bin"):
+def mmap_safetensors(path: str) -> Dict[str, Any]:
+    """
+    Maps a .safetensors file privately (copy-on-write) and returns its tensors
+    as views into the mapping, without reading them into process memory.
+
+    Raises:
+        ValueError: A tensor is not aligned to its element size within the file.
+    """
+    import torch
+
+    with open(path, 'rb') as f:
+        header_len = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_len))
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, SAFETENSORS_DTYPES[info['dtype']])
+        offset = 8 + header_len + info['data_offsets'][0]
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        if offset % itemsize:
+            raise ValueError(f"{name} is not {itemsize}-byte aligned in {path}")
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, offset // itemsize, tuple(info['shape']))
+        tensors[name] = tensor
+    return tensors
+
+def share_bert_weights(model: Any, path: str) -> None:
+    """
+    Swaps the loaded parameters for views of the memory-mapped weight file, so
+    the weights are backed by shared page-cache pages instead of private heap.
+    """
+    try:
+        mapped = mmap_safetensors(path)
+    except Exception as e:
+        log_debug(f"⚠️ BERT weights not memory-mapped: {e}", "WARN")
+        return
+    params = model.state_dict(keep_vars=True)
+    shared = 0
+    for name, tensor in mapped.items():
+        target = params.get(name)
+        if target is None or target.shape != tensor.shape or target.dtype != tensor.dtype:
+            continue
+        target.data = tensor
+        shared += tensor.numel() * tensor.element_size()
+    log_debug(f"✅ BERT weights memory-mapped ({shared / 2**20:.0f} MB shared)", "SUCCESS")
+
+def load_bert() -> str:
+    """Loads the DistilBERT tokenizer and model, then wraps them in `BERT_BACKEND`."""
+    global bert_tokenizer, bert_model, bert_backend
+    if not (os.path.exists("model.safetensors") or os.path.exists("pytorch_model.bin")):
+        log_debug("⚠️ BERT files not found in current directory.", "WARN")
+        return "missing"
     try:
+        from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+
         bert_tokenizer = DistilBertTokenizerFast.from_pretrained(BERT_PATH)
-        bert_model = DistilBertForSequenceClassification.from_pretrained(BERT_PATH)
-        bert_model.eval()
+        model = DistilBertForSequenceClassification.from_pretrained(BERT_PATH)
+        model.eval()
+        if MMAP_WEIGHTS and os.path.exists(os.path.join(BERT_PATH, "model.safetensors")):
+            share_bert_weights(model, os.path.join(BERT_PATH, "model.safetensors"))
+        bert_model = model
         log_debug("✅ BERT Model Loaded", "SUCCESS")
     except Exception as e:
         log_debug(f"❌ BERT Load Failed: {e}", "CRITICAL")
-else:
-    log_debug("⚠️ BERT files not found in current directory.", "WARN")
+        raise
+    bert_backend = load_bert_backend(BERT_BACKEND)
+    return "ready" if bert_backend.name == BERT_BACKEND else "degraded"
 
-# --- Load Anomaly Detector ---
-anomaly_model = None
-if os.path.exists('robust_anomaly_model.pkl'):
+def load_bert_backend(name: str) -> Optional[Any]:
+    """
+    Wraps the loaded BERT model in the requested inference backend
+    ("torch", "int8", "onnx" or "onnx-int8"), falling back to float32 PyTorch.
+    """
+    if not bert_model:
+        return None
     try:
-        anomaly_model = joblib.load('robust_anomaly_model.pkl')
-        log_debug("✅ Anomaly Detector Loaded", "SUCCESS")
-    except Exception:
-        pass
+        if name == "int8":
+            backend = TorchBertBackend(bert_model, quantize=True)
+        elif name in ("onnx", "onnx-int8"):
+            backend = OnnxBertBackend(bert_model, bert_tokenizer, onnx_export_path(), quantize=(name == "onnx-int8"))
+        else:
+            return TorchBertBackend(bert_model)
+        log_debug(f"✅ BERT Backend: {backend.name}", "SUCCESS")
+        return backend
+    except Exception as e:
+        log_debug(f"⚠️ BERT Backend '{name}' Failed. Using torch. {e}", "WARN")
+        return TorchBertBackend(bert_model)
+
+# --- Load Anomaly Detector ---
+def load_anomaly() -> str:
+    """Unpickles the Isolation Forest + Autoencoder detector."""
+    global anomaly_model
+    if not os.path.exists('robust_anomaly_model.pkl'):
+        return "missing"
+    detector = joblib.load('robust_anomaly_model.pkl', mmap_mode='r' if MMAP_WEIGHTS else None)
+    if detector.ae_weights:
+        detector._numpy_params()  # Folded once here, so forked workers share the arrays
+    anomaly_model = detector
+    log_debug("✅ Anomaly Detector Loaded", "SUCCESS")
+    return "ready"
 
 # --- Initialize Explainer ---
-explainer = LimeTextExplainer(class_names=['Real', 'Fake'])
+def load_explainer() -> str:
+    """Creates the LIME text explainer."""
+    global explainer
+    from lime.lime_text import LimeTextExplainer
+
+    explainer = LimeTextExplainer(class_names=['Real', 'Fake'])
+    return "ready"
+
+def _timed_load(name: str, loader: Any, *args: Any) -> None:
+    """Runs a loader and records its state and duration in `MODEL_STATUS`."""
+    status = MODEL_STATUS[name]
+    status['state'] = "loading"
+    start = time.perf_counter()
+    try:
+        status['state'] = loader(*args)
+    except Exception as e:
+        status['state'] = "failed"
+        status['error'] = str(e)
+    finally:
+        status['seconds'] = round(time.perf_counter() - start, 3)
+
+def connect_model_server() -> None:
+    """
+    Client mode: waits for the model server and points the model globals at it,
+    so the `if bert_model` / `sklearn_pipeline` checks keep working unchanged.
+    """
+    global model_server, bert_model, sklearn_pipeline, anomaly_model
+    client = ModelServerClient(MODEL_SERVER_SOCKET)
+    start = time.perf_counter()
+    ready = client.wait_ready(MODEL_LOAD_TIMEOUT)
+    for name in ("spacy", "sklearn", "bert", "anomaly"):
+        MODEL_STATUS[name].update(state="remote" if ready else "failed", seconds=round(time.perf_counter() - start, 3))
+    if not ready:
+        MODEL_STATUS['bert']['error'] = f"Model server not answering on {MODEL_SERVER_SOCKET}"
+        log_debug(f"❌ Model Server unreachable: {MODEL_SERVER_SOCKET}", "CRITICAL")
+        return
+    model_server = bert_model = sklearn_pipeline = anomaly_model = client
+    log_debug(f"✅ Model Server Connected: {MODEL_SERVER_SOCKET}", "SUCCESS")
+
+def _load_all_models(warm_up: bool = True) -> None:
+    """Loads every model concurrently, warms them up and flags the app as ready."""
+    boot_start = time.perf_counter()
+    if MODEL_SERVER_SOCKET:
+        connect_model_server()
+        _timed_load("explainer", load_explainer)
+        MODEL_STATUS['warmup']['state'] = "skipped"  # The server warmed up its own models
+        _models_ready.set()
+        log_debug(f"--- MODELS READY (remote, {time.perf_counter() - boot_start:.1f}s) ---", "STARTUP")
+        return
+    with ThreadPoolExecutor(max_workers=5, thread_name_prefix="loader") as pool:
+        spacy_loaded = pool.submit(_timed_load, "spacy", load_spacy)
+        pool.submit(_timed_load, "sklearn", load_sklearn, spacy_loaded)
+        pool.submit(_timed_load, "bert", load_bert)
+        pool.submit(_timed_load, "anomaly", load_anomaly)
+        pool.submit(_timed_load, "explainer", load_explainer)
+
+    if WARMUP_ENABLED and warm_up:
+        _timed_load("warmup", warm_up_models)
+    else:
+        MODEL_STATUS['warmup']['state'] = "skipped" if not WARMUP_ENABLED else "deferred"
+
+    _models_ready.set()
+    log_debug(f"--- MODELS READY ({time.perf_counter() - boot_start:.1f}s) ---", "STARTUP")
+
+def start_model_loading(block: bool = False) -> None:
+    """
+    Starts the concurrent model loads once per process.
+
+    Args:
+        block (bool): Wait until every model is loaded and warmed up.
+    """
+    global _loading_started
+    with _loading_lock:
+        if not _loading_started:
+            _loading_started = True
+            threading.Thread(target=_load_all_models, name="model-loader", daemon=True).start()
+    if block:
+        _models_ready.wait()
+
+def ensure_models_loaded(timeout: Optional[float] = MODEL_LOAD_TIMEOUT) -> bool:
+    """Starts loading if needed and waits for readiness. Returns False on timeout."""
+    start_model_loading()
+    return _models_ready.wait(timeout)
+
+# ==========================================
+# 5. BATCHED MODEL STAGES
+# ==========================================
+
+# Merges the per-window 'Fake' probabilities of one posting
+WINDOW_REDUCERS: Dict[str, Any] = {
+    "max": np.max,
+    "mean": np.mean,
+    "noisy_or": lambda p: 1.0 - np.prod(1.0 - p),  # Fake if any window is fake
+}
+
+def encode_bert_windows(texts: List[str], chunked: bool) -> Tuple[List[List[int]], np.ndarray]:
+    """
+    Tokenizes postings into BERT input windows (special tokens included).
+
+    Args:
+        texts (List[str]): The postings.
+        chunked (bool): Split long postings into overlapping windows instead of truncating.
+
+    Returns:
+        Tuple[List[List[int]], np.ndarray]: (Windows, Index_of_owning_text_per_window)
+    """
+    if not chunked:
+        windows = bert_tokenizer(texts, truncation=True, max_length=BERT_MAX_LENGTH)['input_ids']
+        return windows, np.arange(len(texts))
+
+    body = BERT_MAX_LENGTH - 2  # Room for [CLS] and [SEP]
+    step = max(body - BERT_STRIDE, 1)
+    cls_id, sep_id = bert_tokenizer.cls_token_id, bert_tokenizer.sep_token_id
+
+    windows, owners = [], []
+    for i, tokens in enumerate(bert_tokenizer(texts, add_special_tokens=False, verbose=False)['input_ids']):
+        start = 0
+        while True:
+            windows.append([cls_id] + tokens[start:start + body] + [sep_id])
+            owners.append(i)
+            if start + body >= len(tokens):
+                break
+            start += step
+    return windows, np.array(owners)
+
+def run_bert_buckets(windows: List[List[int]], batch_size: int, backend: Any) -> np.ndarray:
+    """
+    Scores token windows in length buckets: windows are sorted by length so each
+    forward pass only pads up to its own longest window.
+
+    Returns:
+        np.ndarray: The 'Fake' probability for each window, in input order.
+    """
+    probs = np.empty(len(windows))
+    order = np.argsort([len(w) for w in windows], kind="stable")
+
+    for i in range(0, len(order), batch_size):
+        bucket = order[i:i + batch_size]
+        width = max(len(windows[j]) for j in bucket)
+        input_ids = np.full((len(bucket), width), bert_tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(bucket), width), dtype=np.int64)
+        for row, j in enumerate(bucket):
+            input_ids[row, :len(windows[j])] = windows[j]
+            attention_mask[row, :len(windows[j])] = 1
+
+        logits = backend.logits({'input_ids': input_ids, 'attention_mask': attention_mask})
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))  # Softmax
+        probs[bucket] = exp[:, 1] / exp.sum(axis=1)
+    return probs
+
+def bert_predict_proba(texts: List[str], batch_size: int = 16, backend: Optional[Any] = None,
+                       chunked: Optional[bool] = None, reducer: Optional[str] = None) -> np.ndarray:
+    """
+    Runs DistilBERT over many texts in length-bucketed, padded forward passes.
+
+    Args:
+        texts (List[str]): The postings to score.
+        batch_size (int): Maximum number of windows per forward pass.
+        backend (Optional[Any]): Inference backend to use (defaults to `bert_backend`).
+        chunked (Optional[bool]): Sliding-window scoring (defaults to `BERT_CHUNKING`).
+        reducer (Optional[str]): Name in `WINDOW_REDUCERS` (defaults to `BERT_REDUCER`).
+
+    Returns:
+        np.ndarray: The 'Fake' probability for each text (0.5 if BERT is unavailable).
+    """
+    if model_server is not None and backend is None and texts:
+        return np.asarray(model_server.call("bert", list(texts)), dtype=np.float64)
+    backend = backend or bert_backend
+    if not backend or not texts:
+        return np.full(len(texts), 0.5)
+
+    chunked = BERT_CHUNKING if chunked is None else chunked
+    windows, owners = encode_bert_windows(texts, chunked)
+    window_probs = run_bert_buckets(windows, batch_size, backend)
+    if not chunked:
+        return window_probs
+
+    reduce = WINDOW_REDUCERS[reducer or BERT_REDUCER]
+    return np.array([reduce(window_probs[owners == i]) for i in range(len(texts))])
+
+@STAGE_SECONDS.timed(stage="spacy")
+def spacy_docs(texts: List[str], n_process: Optional[int] = None) -> List[Any]:
+    """
+    Parses many texts with `nlp.pipe` in SPACY_BATCH_SIZE batches. Worker
+    processes (SPACY_N_PROCESS) are only started for at least
+    SPACY_MP_MIN_TEXTS texts, where they outweigh their start-up cost.
+    """
+    if model_server is not None:
+        return [None] * len(texts)  # The model server parses for its own stages
+    if n_process is None:
+        n_process = SPACY_N_PROCESS if len(texts) >= SPACY_MP_MIN_TEXTS else 1
+    return list(nlp_engine.pipe(texts, batch_size=SPACY_BATCH_SIZE, n_process=n_process))
+
+def sklearn_predict_proba(texts: List[str], docs: Optional[List[Any]] = None, perturbations: bool = False) -> np.ndarray:
+    """
+    Runs the sklearn pipeline over many texts in a single `predict_proba` call.
+
+    Args:
+        texts (List[str]): The postings to score.
+        docs (Optional[List[Any]]): Spacy docs already parsed for `texts`, reused
+            by SpacyVectorTransformer instead of re-tokenizing.
+        perturbations (bool): `texts` are word-dropped variants of one posting
+            (LIME); their Spacy vectors come from PerturbationVectorizer.
+
+    Returns:
+        np.ndarray: The 'Fake' probability for each text (0.5 if the pipeline is unavailable).
+    """
+    if not sklearn_pipeline:
+        return np.full(len(texts), 0.5)
+    if model_server is not None:
+        return np.asarray(model_server.call("sklearn_lime" if perturbations else "sklearn", list(texts)), dtype=np.float64)
+
+    _spacy_context.docs = docs
+    _spacy_context.perturbations = perturbations and LIME_MASKED_VECTORS
+    try:
+        return sklearn_pipeline.predict_proba(texts)[:, 1]
+    finally:
+        _spacy_context.docs = None
+        _spacy_context.perturbations = False
+
+def anomaly_features(texts: List[str], docs: List[Any]) -> np.ndarray:
+    """Stacks the 300-d Spacy vector and the structural features for each text."""
+    vectors = np.array([doc.vector for doc in docs])
+    return np.hstack((vectors, extract_structural_features_batch(texts, dtype=np.float64)))
+
+def anomaly_explain_batch(features: np.ndarray) -> List[List[str]]:
+    """Runs the anomaly detector over a feature matrix (no alerts if it is unavailable)."""
+    if not anomaly_model:
+        return [[] for _ in range(len(features))]
+    return anomaly_model.predict_batch_with_explanation(features)
+
+def anomaly_predict(texts: List[str], docs: Optional[List[Any]] = None) -> List[List[str]]:
+    """Anomaly alerts for many texts (Spacy docs are parsed here unless given)."""
+    if model_server is not None:
+        return model_server.call("anomaly", list(texts))
+    if not anomaly_model:
+        return [[] for _ in range(len(texts))]
+    return anomaly_explain_batch(anomaly_features(texts, docs if docs is not None else spacy_docs(texts)))
+
+class MicroBatcher:
+    """
+    Gathers items submitted concurrently by request threads and runs them
+    through `batch_fn` as one batch. A batch is flushed once it holds
+    `max_batch_size` items or `max_wait_ms` has passed since its first item.
+    """
+    def __init__(self, name: str, batch_fn: Any, max_batch_size: int, max_wait_ms: float, enabled: bool = True,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.enabled = enabled
+        self.executor = executor  # Runs single items when batching is disabled (else inline)
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, item: Any) -> Future:
+        """Queues a single item and returns a Future resolving to its result."""
+        if not self.enabled and self.executor is not None:
+            return self.executor.submit(lambda: self.batch_fn([item])[0])
+
+        future: Future = Future()
+        if not self.enabled:
+            try:
+                future.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_worker()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item: Any) -> Any:
+        """Submits a single item and blocks until its batch has been processed."""
+        return self.submit(item).result()
+
+    def pending(self) -> int:
+        """Items waiting for the next batch."""
+        return self._queue.qsize()
+
+    def _ensure_worker(self) -> None:
+        # Started lazily so forked workers spawn their own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True)
+                self._worker.start()
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000.0
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+def _sklearn_batch(items: List[Tuple[str, Any]]) -> np.ndarray:
+    texts, docs = zip(*items)
+    return sklearn_predict_proba(list(texts), list(docs))
+
+def _anomaly_batch(items: List[Tuple[str, Any]]) -> List[List[str]]:
+    texts, docs = zip(*items)
+    return anomaly_predict(list(texts), list(docs))
+
+stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="stage")
+
+bert_batcher = MicroBatcher(
+    "bert", lambda texts: bert_predict_proba(texts, BATCH_MAX_SIZE),
+    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, MICRO_BATCHING, stage_executor
+)
+sklearn_batcher = MicroBatcher("sklearn", _sklearn_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, MICRO_BATCHING, stage_executor)
+anomaly_batcher = MicroBatcher("anomaly", _anomaly_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, MICRO_BATCHING, stage_executor)
+
+def submit_stage(name: str, batcher: MicroBatcher, item: Any) -> Future:
+    """Queues one item on a model stage and records its latency when it completes."""
+    start = time.perf_counter()
+    future = batcher.submit(item)
+    future.add_done_callback(lambda _: STAGE_SECONDS.observe(time.perf_counter() - start, stage=name))
+    return future
+
+def await_stages(futures: Dict[str, Future], started: float) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Collects concurrently running stages, each until its own deadline
+    (STAGE_TIMEOUTS_MS after `started`, a `time.monotonic()` value).
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: Results of the stages that finished,
+        and the names of those that timed out (their work is abandoned).
+    """
+    results: Dict[str, Any] = {}
+    timed_out: List[str] = []
+    for name, future in futures.items():
+        timeout_ms = STAGE_TIMEOUTS_MS[name]
+        remaining = None if timeout_ms <= 0 else max(timeout_ms / 1000.0 - (time.monotonic() - started), 0.0)
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            timed_out.append(name)
+            STAGE_TIMEOUTS_TOTAL.inc(stage=name)
+    return results, timed_out
 
 # ==========================================
-# 5. ENSEMBLE PREDICTION FOR LIME
+# 6. ENSEMBLE PREDICTION FOR LIME
 # ==========================================
 
-def ensemble_lime_predict(texts: List[str]) -> np.ndarray:
+def ensemble_lime_predict(texts: List[str], use_bert: bool = True) -> np.ndarray:
     """
     A unified prediction function for LIME that replicates the system's 
     multi-model consensus logic (BERT + Sklearn).
     
     This ensures that LIME explains the *Combined* decision, not just BERT's.
+    With `use_bert=False` it explains a cascade verdict decided without BERT:
+    the Sklearn score stands in for BERT, as it did in the verdict.
     """
-    num_samples = len(texts)
-    
-    # 1. Get BERT Probabilities (with Batching)
-    bert_probs = np.zeros(num_samples)
-    if bert_model:
-        batch_size = 16
-        for i in range(0, num_samples, batch_size):
-            batch_texts = texts[i:i + batch_size]
-            inputs = bert_tokenizer(
-                batch_texts, 
-                return_tensors="pt", 
-                padding=True, 
-                truncation=True, 
-                max_length=512
-            )
-            with torch.no_grad():
-                logits = bert_model(**inputs).logits
-                batch_probs = F.softmax(logits, dim=1).numpy()
-                bert_probs[i:i+batch_size] = batch_probs[:, 1] # Store 'Fake' prob only
-    else:
-        bert_probs[:] = 0.5  # Fallback
+    # 1. Get Sklearn Probabilities
+    try:
+        # Sklearn pipelines usually handle lists of strings directly
+        sklearn_probs = sklearn_predict_proba(texts, perturbations=True)
+    except Exception:
+        sklearn_probs = np.full(len(texts), 0.5)
 
-    # 2. Get Sklearn Probabilities
-    sklearn_probs = np.zeros(num_samples)
-    if sklearn_pipeline:
-        try:
-            # Sklearn pipelines usually handle lists of strings directly
-            sk_preds = sklearn_pipeline.predict_proba(texts)
-            sklearn_probs = sk_preds[:, 1]
-        except Exception:
-            sklearn_probs[:] = 0.5
-    else:
-        sklearn_probs[:] = 0.5
+    # 2. Get BERT Probabilities (with Batching)
+    bert_probs = bert_predict_proba(texts, batch_size=16) if use_bert else sklearn_probs
 
-    # 3. Combine Logic (Vectorized equivalent of the 'predict' route logic)
-    final_probs = []
-    
-    for pb, ps in zip(bert_probs, sklearn_probs):
-        final_prob = 0.0
+    # 3. Combine through the same scoring policy as predict(). The anomaly rules
+    # never fire here: LIME perturbs words, not the structural features.
+    final_probs = scoring_policy.fuse(bert_probs, sklearn_probs)
+    return np.column_stack((1 - final_probs, final_probs))
+
+@STAGE_SECONDS.timed(stage="lime")
+def generate_xai_insights(text: str, trace: Any, use_bert: bool = True) -> List[str]:
+    """
+    Runs LIME over the ensemble predictor and formats the significant words.
+
+    Args:
+        text (str): The job posting.
+        trace (Callable): Logger for failures.
+        use_bert (bool): False for cascade verdicts decided without BERT, so
+            the perturbations are not sent through BERT either.
+
+    Returns:
+        List[str]: Human-readable word impacts.
+    """
+    LIME_RUNS_TOTAL.inc()
+    try:
+        # Use the new ENSEMBLE predictor that combines both models
+        exp = explainer.explain_instance(
+            text, 
+            functools.partial(ensemble_lime_predict, use_bert=use_bert),  # <--- CHANGED FROM BERT TO ENSEMBLE
+            labels=(1,), 
+            num_features=6, 
+            num_samples=LIME_NUM_SAMPLES
+        )
         
-        # --- Logic mirroring the main predict() route ---
-        # 1. BERT Authority
-        if pb > 0.85:
-            final_prob = pb
-        # 2. Sklearn Backup
-        elif ps > 0.80:
-            final_prob = ps
-        # 3. Consensus
-        elif pb > 0.60 and ps > 0.60:
-            final_prob = (pb + ps) / 2
-        # 4. Review / Mixed Logic
-        else:
-            final_prob = max(pb, ps)
-            
-            # Note: We omit the complex 'Anomaly' override here because LIME
-            # perturbs text, not the structural anomalies. We focus on text classifiers.
-            
-            # Simple fallback for low-confidence zones
-            if final_prob < 0.45:
-                 # If both are very low, trust the safety
-                 pass 
+        # Filter for significant contributors (>5% impact)
+        lime_insights = [
+            f"**{feature}** ({round(weight * 100)}% impact)" 
+            for feature, weight in exp.as_list(label=1) 
+            if weight > 0.05
+        ]
         
-        final_probs.append([1 - final_prob, final_prob])
+        if not lime_insights:
+            lime_insights = ["Complex pattern detected (No single keyword dominant)"]
+        return lime_insights
+    except Exception as e:
+        trace(f"LIME Failed: {str(e)}", "ERROR")
+        return ["AI reasoning unavailable"]
+
+def warm_up_models() -> str:
+    """
+    Pushes a synthetic posting through every stage so the first real request
+    doesn't pay for lazy initialization, JIT and buffer allocation.
+    """
+    text = "We are hiring a Software Engineer. Salary: 12 LPA. Apply via our company careers page."
+    docs = [nlp_engine(text)]
+    bert_predict_proba([text, text[:40]])  # Padded batch as well as a single row
+    sklearn_predict_proba([text], docs)
+    anomaly_explain_batch(anomaly_features([text], docs))
+    heuristic_analysis(text)
+    detect_invalid_language(text)
+    log_debug("✅ Warm-up Inference Complete", "SUCCESS")
+    return "ready"
+
+# ==========================================
+# 7. DEFERRED XAI JOBS
+# ==========================================
+
+# Jobs are keyed by the cache key of the posting, so concurrent requests for the
+# same text share one LIME run and a finished job can be recovered from the cache.
+XAI_JOBS: Dict[str, Dict[str, Any]] = {}
+_xai_jobs_lock = threading.Lock()
+xai_executor = ThreadPoolExecutor(max_workers=XAI_WORKERS, thread_name_prefix="xai")
+
+def schedule_xai_job(job_id: str, text: str, use_bert: bool = True) -> None:
+    """
+    Queues LIME for a posting on the XAI worker pool. Once finished, the
+    insights are stored on the job and merged into the cached response.
 
-    return np.array(final_probs)
+    Args:
+        job_id (str): The cache key of the posting.
+        text (str): The job posting.
+        use_bert (bool): False if the cascade decided the verdict without BERT.
+    """
+    with _xai_jobs_lock:
+        if job_id in XAI_JOBS and XAI_JOBS[job_id]['status'] == "pending":
+            return
+        XAI_JOBS[job_id] = {'status': "pending", 'xai_insights': [], 'done': threading.Event()}
+        # Evict the oldest finished jobs once the store is full
+        for old_id in [k for k, v in XAI_JOBS.items() if v['status'] != "pending"][:max(len(XAI_JOBS) - XAI_JOB_LIMIT, 0)]:
+            del XAI_JOBS[old_id]
+
+    xai_executor.submit(_run_xai_job, job_id, text, use_bert)
+
+def _run_xai_job(job_id: str, text: str, use_bert: bool) -> None:
+    insights = generate_xai_insights(text, log_debug, use_bert)
+
+    cached = cache.get(job_id)
+    if cached:
+        cache.set(job_id, {**cached, 'xai_insights': insights, 'xai_status': "ready"})
+
+    with _xai_jobs_lock:
+        job = XAI_JOBS.get(job_id)
+        if job is not None:
+            job['xai_insights'] = insights
+            job['status'] = "ready"
+            job['done'].set()
+    log_debug(f"XAI Ready for {job_id[:8]}", "AI")
+
+def resume_xai_job(job_id: str, text: str, cached: Dict[str, Any]) -> None:
+    """
+    Re-queues LIME for a cached response still marked pending when this process
+    has no job for it. The cache is shared, the jobs are not: the entry may have
+    been stored by another worker, or before a restart that lost its job.
+    """
+    if cached.get('xai_status') != "pending":
+        return
+    with _xai_jobs_lock:
+        if job_id in XAI_JOBS:
+            return
+    schedule_xai_job(job_id, text, use_bert='bert' not in cached.get('skipped_stages', []))
+
+def get_xai_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the public state of an XAI job, falling back to the shared result
+    cache (pending entries may be computed by another worker).
+    """
+    with _xai_jobs_lock:
+        job = XAI_JOBS.get(job_id)
+        if job is not None:
+            return {'job_id': job_id, 'status': job['status'], 'xai_insights': job['xai_insights']}
+
+    cached = cache.get(job_id)
+    if cached:
+        status = cached.get('xai_status', "ready")
+        return {'job_id': job_id, 'status': status, 'xai_insights': cached.get('xai_insights', []) if status == "ready" else []}
+    return None
 
 # ==========================================
-# 6. MAIN PREDICTION ROUTE
+# 8. MAIN PREDICTION ROUTES
 # ==========================================
 
+def count_verdict(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Counts a returned analysis result in `jobguard_verdicts_total` (errors are not counted)."""
+    if 'verdict' in response:
+        VERDICTS_TOTAL.inc(verdict=response['verdict'])
+    return response
+
+def build_gibberish_response(lang_issues: List[str]) -> Dict[str, Any]:
+    """Builds the response returned for text rejected by `detect_invalid_language`."""
+    return {
+        'fraud_probability': 0, 
+        'is_gibberish': True, 
+        'reasons': [], 
+        'advisory': [], 
+        'anomaly_analysis': lang_issues, 
+        'xai_insights': [],
+        'system_logs': [], 
+        'verdict': "Invalid"
+    }
+
+@STAGE_SECONDS.timed(stage="near_duplicate")
+def find_near_duplicate(text: str) -> Optional[Dict[str, Any]]:
+    """Nearest indexed posting if it is similar enough to flag or short-circuit, else None."""
+    thresholds = [t for t in (NEARDUP_FLAG_THRESHOLD, NEARDUP_SHORT_CIRCUIT) if t > 0]
+    if not thresholds:
+        return None
+    match = near_duplicate_index.query(text)
+    if match is None or match['similarity'] < min(thresholds):
+        return None
+    return {k: match[k] for k in ('similarity', 'verdict', 'fraud_probability')}
+
+def should_short_circuit(match: Optional[Dict[str, Any]]) -> bool:
+    return bool(match) and NEARDUP_SHORT_CIRCUIT > 0 and match['similarity'] >= NEARDUP_SHORT_CIRCUIT
+
+def annotate_known_campaign(response: Dict[str, Any], match: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Marks a response as a repost of a posting previously scored Fake."""
+    if match and match['verdict'] == "Fake" and match['similarity'] >= NEARDUP_FLAG_THRESHOLD:
+        response['known_campaign'] = match
+        response['reasons'] = response['reasons'] + [
+            f"🔁 **Known Campaign:** {match['similarity'] * 100:.0f}% similar to a posting previously flagged as fake."
+        ]
+    return response
+
+def build_near_duplicate_response(text: str, match: Dict[str, Any], defer_xai: bool = False) -> Dict[str, Any]:
+    """Answers a near-verbatim repost with the prior verdict instead of running the models."""
+    response = {
+        'fraud_probability': match['fraud_probability'],
+        'reasons': heuristic_analysis(text),
+        'advisory': metadata_check(text),
+        'anomaly_analysis': [],
+        'is_gibberish': False,
+        'xai_insights': [],
+        'system_logs': [],
+        'verdict': match['verdict'],
+        'near_duplicate_of': match,
+    }
+    if defer_xai:
+        response['xai_status'] = "ready"
+    return annotate_known_campaign(response, match)
+
+def remember_posting(text: str, response: Dict[str, Any]) -> None:
+    """Adds a freshly scored posting to the near-duplicate index (and persists it every NEARDUP_SAVE_EVERY)."""
+    if not NEARDUP_LEARN:
+        return
+    near_duplicate_index.add(text, response['verdict'], response['fraud_probability'])
+    if NEARDUP_SAVE_EVERY and near_duplicate_index.added % NEARDUP_SAVE_EVERY == 0:
+        near_duplicate_index.save(NEARDUP_PATH)
+
+def filter_anomaly_alerts(anomaly_alerts: List[str], trace: Any) -> List[str]:
+    """Drops anomaly alerts whose reconstruction error is too weak to matter."""
+    mse_value = 0.0
+    for alert in anomaly_alerts:
+        match = re.search(r"MSE:\s*([\d\.]+)", alert)
+        if match:
+            mse_value = float(match.group(1))
+
+    if mse_value > 0.008: 
+        trace(f"Anomaly Detected (MSE {mse_value:.4f})", "WARN")
+        return anomaly_alerts
+    return []  # Silently drop very weak anomalies
+
+def fuse_scores(bert_score: float, sklearn_score: float, anomaly_alerts: List[str], trace: Any) -> float:
+    """
+    The ensemble decision for one posting: fuses the model scores (and whether
+    the anomaly detector raised alerts) into the final fraud probability
+    through `scoring_policy`, and traces the rule that decided it.
+    """
+    final, decided_by, overridden = scoring_policy.evaluate([bert_score], [sklearn_score], [bool(anomaly_alerts)])
+    if overridden[0] and anomaly_alerts:
+        trace(f"Anomaly Silenced: Overridden by Safety Logic (BERT {bert_score:.2f})", "INFO")
+    rule = scoring_policy.rules[decided_by[0]]
+    trace(rule.log, rule.level)
+    return float(final[0])
+
+def cascade_needs_bert(sklearn_score: float, heuristic_flags: int, anomaly_alerts: List[str],
+                       low: Optional[float] = None, high: Optional[float] = None) -> bool:
+    """
+    Cascade policy: whether BERT still has to run once the cheap signals are in.
+    A Sklearn score at or above `high` is decisive on its own; one at or below
+    `low` is decisive only if no heuristic rule fired and the anomaly detector
+    stayed quiet. Everything in between is uncertain and goes to BERT.
+    """
+    low = CASCADE_LOW if low is None else low
+    high = CASCADE_HIGH if high is None else high
+    if sklearn_score >= high:
+        return False
+    if sklearn_score <= low and not heuristic_flags and not anomaly_alerts:
+        return False
+    return True
+
+def verdict_of(final_prob: float) -> str:
+    """Maps a fused fraud probability onto the API verdict."""
+    return str(scoring_policy.verdicts([final_prob])[0])
+
+def assemble_verdict(text: str, bert_score: float, sklearn_score: float, anomaly_alerts: List[str], trace: Any,
+                     defer_xai: bool = False, explain: bool = True, bert_skipped: bool = False,
+                     reasons: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Fuses the three model scores into the final probability, generates XAI
+    insights and builds the response payload (without `system_logs`).
+
+    Args:
+        text (str): The job posting.
+        bert_score (float): DistilBERT 'Fake' probability.
+        sklearn_score (float): Sklearn pipeline 'Fake' probability.
+        anomaly_alerts (List[str]): Filtered anomaly detector alerts.
+        trace (Callable): Logger for the scoring decisions.
+        defer_xai (bool): Skip LIME and mark the response with `xai_status`
+            ("pending" when insights still have to be computed).
+        explain (bool): Whether LIME may run at all; if not, an explainable
+            verdict gets `xai_status` "skipped" (bulk scoring).
+        bert_skipped (bool): The cascade decided without BERT (`bert_score` is
+            the Sklearn score); LIME then explains that decision without BERT.
+        reasons (Optional[List[str]]): `heuristic_analysis(text)` if the caller
+            already ran it (the cascade does); computed here otherwise.
+
+    Returns:
+        Dict[str, Any]: The analysis result.
+    """
+    # =========================================================
+    # 🧠 SCORING LOGIC
+    # =========================================================
+    scoring_start = time.perf_counter()
+    final_prob = fuse_scores(bert_score, sklearn_score, anomaly_alerts, trace)
+    trace(f"Final Scoring: {final_prob:.4f}", "RESULT")
+    STAGE_SECONDS.observe(time.perf_counter() - scoring_start, stage="scoring")
+
+    # =========================================================
+    # 🔍 UPDATED XAI GENERATION (ENSEMBLE)
+    # =========================================================
+    lime_insights = []
+    xai_pending = False
+    xai_skipped = False
+    if final_prob > scoring_policy.review_threshold:  # LIME explains "Review" and "Fake" verdicts
+        if not explain:
+            xai_skipped = True
+        elif defer_xai:
+            xai_pending = True  # Computed later by the XAI worker pool
+        else:
+            lime_insights = generate_xai_insights(text, trace, use_bert=not bert_skipped)
+
+    # Final Response Construction
+    response = {
+        'fraud_probability': round(final_prob * 100, 2),
+        'reasons': heuristic_analysis(text) if reasons is None else reasons,
+        'advisory': metadata_check(text),
+        'anomaly_analysis': anomaly_alerts,
+        'is_gibberish': False,
+        'xai_insights': lime_insights,
+        'verdict': verdict_of(final_prob)
+    }
+    if xai_skipped:
+        response['xai_status'] = "skipped"
+    elif defer_xai:
+        response['xai_status'] = "pending" if xai_pending else "ready"
+    return response
+
+class ModelsLoadingError(RuntimeError):
+    """Raised when postings need the models but they are still loading."""
+
+def models_loading_response() -> Tuple[Any, int, Dict[str, str]]:
+    """503 for requests that arrive before the models are ready (clients retry, workers never block)."""
+    return jsonify({'error': 'Models are still loading'}), 503, {'Retry-After': str(MODEL_LOADING_RETRY_AFTER)}
+
+def analyze_posting(text: str, text_hash: str, defer_xai: bool, trace: Any, trace_logs: List[str]) -> Dict[str, Any]:
+    """
+    The `/predict` pipeline for a posting that missed the result cache: language
+    check, near-duplicate lookup, the three models, the verdict and XAI. Caches
+    and returns the response.
+
+    Raises:
+        ModelsLoadingError: The models are still loading.
+    """
+    # 1. GIBBERISH CHECK
+    is_invalid_lang, lang_issues = detect_invalid_language(text)
+    if is_invalid_lang:
+        response = build_gibberish_response(lang_issues)
+        cache.set(text_hash, response)
+        return response
+
+    # 2. NEAR-DUPLICATE CHECK (reposted campaign variants)
+    near_match = find_near_duplicate(text)
+    if should_short_circuit(near_match):
+        trace(f"Near-Duplicate: {near_match['similarity']:.2f} similar to a prior '{near_match['verdict']}' posting", "RESULT")
+        response = build_near_duplicate_response(text, near_match, defer_xai)
+        response['system_logs'] = list(reversed(trace_logs))
+        cache.set(text_hash, response)
+        return response
+
+    if not ensure_models_loaded(timeout=0):
+        raise ModelsLoadingError()
+
+    # 3. RUN MODELS (concurrently, each micro-batched with concurrent requests)
+    doc = spacy_docs([text], n_process=1)[0]
+    g.spacy_doc = doc  # Store for transformer reuse
+
+    # In cascade mode BERT waits until the cheap stages have had their say
+    cascade = CASCADE_ENABLED and bert_model is not None and sklearn_pipeline is not None
+    started = time.monotonic()
+    futures: Dict[str, Future] = {}
+    if bert_model and not cascade:
+        futures['bert'] = submit_stage("bert", bert_batcher, text)
+    if sklearn_pipeline:
+        futures['sklearn'] = submit_stage("sklearn", sklearn_batcher, (text, doc))
+    if anomaly_model:
+        futures['anomaly'] = submit_stage("anomaly", anomaly_batcher, (text, doc))
+    stage_results, timed_out = await_stages(futures, started)
+
+    # --- MODEL 3: ANOMALY ---
+    anomaly_alerts = []
+    if 'anomaly' in stage_results:
+        anomaly_alerts = filter_anomaly_alerts(stage_results['anomaly'], trace)
+
+    # --- MODEL 2: SKLEARN ---
+    sklearn_score = 0.5
+    if 'sklearn' in stage_results:
+        sklearn_score = float(stage_results['sklearn'])
+        trace(f"Sklearn Confidence: {sklearn_score:.4f}", "AI")
+
+    # --- MODEL 1: BERT ---
+    reasons = heuristic_analysis(text)  # One rule-engine pass for the cascade and the response
+    bert_skipped = False
+    if cascade:
+        if 'sklearn' in stage_results and not cascade_needs_bert(sklearn_score, len(reasons), anomaly_alerts):
+            bert_skipped = True
+            stage_results['bert'] = sklearn_score
+            trace(f"Cascade: Sklearn decisive ({sklearn_score:.2f}) -> BERT skipped", "AI")
+        else:
+            bert_results, bert_timed_out = await_stages({'bert': submit_stage("bert", bert_batcher, text)}, time.monotonic())
+            stage_results.update(bert_results)
+            timed_out += bert_timed_out
+        CASCADE_TOTAL.inc(decision="bert_skipped" if bert_skipped else "bert_run")
+    for name in timed_out:
+        trace(f"Stage Timeout: {name} missed its {STAGE_TIMEOUTS_MS[name]:.0f} ms deadline (neutral fallback)", "WARN")
+
+    bert_score = 0.5
+    if 'bert' in stage_results:
+        bert_score = float(stage_results['bert'])
+        if not bert_skipped:
+            trace(f"BERT Confidence: {bert_score:.4f}", "AI")
+
+    response = assemble_verdict(text, bert_score, sklearn_score, anomaly_alerts, trace, defer_xai,
+                                bert_skipped=bert_skipped, reasons=reasons)
+    if bert_skipped:
+        response['skipped_stages'] = ['bert']
+    if timed_out:
+        response['timed_out_stages'] = timed_out
+    else:
+        remember_posting(text, response)  # Degraded verdicts are neither indexed nor cached
+    response = annotate_known_campaign(response, near_match)
+    response['system_logs'] = list(reversed(trace_logs))
+
+    xai_pending = response.get('xai_status') == "pending"
+    if xai_pending:
+        response['xai_job_id'] = text_hash
+    if not timed_out:
+        cache.set(text_hash, response)
+    if xai_pending:
+        # Cache first, so the finished job always lands on the stored entry
+        schedule_xai_job(text_hash, text, use_bert=not bert_skipped)
+        trace(f"XAI Deferred: job {text_hash[:8]}", "INFO")
+    return response
+
 @app.route('/predict', methods=['POST'])
 def predict() -> Any:
     """
@@ -498,193 +1921,395 @@ def predict() -> Any:
         text = data.get('text', '').strip()
         if not text:
             return jsonify({'error': 'No input'}), 400
+        defer_xai = bool(data.get('defer_xai', DEFER_XAI))
         
-        # Check Cache
-        text_hash = hashlib.md5(text.lower().encode('utf-8')).hexdigest()
-        cached = cache.get(text_hash)
+        # Check Cache (a copy, so the admin trace never leaks into the stored entry)
+        text_hash = result_cache_key(text)
+        cached = cache_lookup(text_hash)
         if cached:
             if is_admin: 
                 cached['system_logs'] = [f"[CACHE] Hit for {text_hash[:8]}"] + cached.get('system_logs', [])
-            return jsonify(cached)
+            resume_xai_job(text_hash, text, cached)
+            return jsonify(record_scan(text_hash, count_verdict(cached)))
 
-        # 1. GIBBERISH CHECK
-        is_invalid_lang, lang_issues = detect_invalid_language(text)
-        if is_invalid_lang:
-            response = {
-                'fraud_probability': 0, 
-                'is_gibberish': True, 
-                'reasons': [], 
-                'advisory': [], 
-                'anomaly_analysis': lang_issues, 
-                'xai_insights': [],
-                'system_logs': [], 
-                'verdict': "Invalid"
-            }
-            cache.set(text_hash, response)
-            return jsonify(response)
-
-        # 2. RUN MODELS
-        doc = nlp_engine(text)
-        g.spacy_doc = doc  # Store for transformer reuse
-
-        # --- MODEL 1: BERT ---
-        bert_score = 0.5
-        if bert_model:
-            inputs = bert_tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-            with torch.no_grad():
-                outputs = bert_model(**inputs)
-            bert_score = F.softmax(outputs.logits, dim=1)[0][1].item()
-            trace(f"BERT Confidence: {bert_score:.4f}", "AI")
-
-        # --- MODEL 2: SKLEARN ---
-        sklearn_score = 0.5
-        if sklearn_pipeline:
-            sklearn_score = sklearn_pipeline.predict_proba([text])[0][1]
-            trace(f"Sklearn Confidence: {sklearn_score:.4f}", "AI")
-
-        # --- MODEL 3: ANOMALY ---
-        anomaly_alerts = []
-        mse_value = 0.0
-        if anomaly_model:
-            stats = extract_structural_features(text)
-            features = np.hstack((doc.vector, np.array(stats)))
-            anomaly_alerts = anomaly_model.predict_with_explanation(features)
-            
-            for alert in anomaly_alerts:
-                match = re.search(r"MSE:\s*([\d\.]+)", alert)
-                if match:
-                    mse_value = float(match.group(1))
-            
-            if mse_value > 0.008: 
-                trace(f"Anomaly Detected (MSE {mse_value:.4f})", "WARN")
-            else:
-                anomaly_alerts = []  # Silently drop very weak anomalies
+        # Identical postings already being analyzed share that computation
+        if COALESCE_ENABLED:
+            response, shared = inflight_predictions.run(
+                text_hash, lambda: analyze_posting(text, text_hash, defer_xai, trace, trace_logs))
+        else:
+            response, shared = analyze_posting(text, text_hash, defer_xai, trace, trace_logs), False
+        if shared:
+            # The first caller's trace belongs to that caller
+            response = {**response, 'system_logs': [f"[COALESCED] Shared in-flight analysis {text_hash[:8]}"] if is_admin else []}
+        return jsonify(record_scan(text_hash, count_verdict(response)))
+
+    except ModelsLoadingError:
+        return models_loading_response()
+    except Exception as e:
+        trace(f"FATAL: {str(e)}", "ERROR")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
-        # =========================================================
-        # 🧠 SCORING LOGIC
-        # =========================================================
-        
-        final_prob = 0.0
-        
-        # 1. BERT AUTHORITY
-        if bert_score > 0.85:
-            final_prob = bert_score
-            trace("Logic: BERT Authority", "RESULT")
-            
-        # 2. SKLEARN BACKUP
-        elif sklearn_score > 0.80:
-            final_prob = sklearn_score
-            trace("Logic: Sklearn Override", "RESULT")
+def score_batch(texts: List[str], defer_xai: bool = False, explain: Optional[List[bool]] = None) -> List[Dict[str, Any]]:
+    """
+    Scores many postings, running every model once over the whole batch.
+    Shared by `/predict/batch` and the offline `bulk_score.py`.
 
-        # 3. CONSENSUS
-        elif bert_score > 0.60 and sklearn_score > 0.60:
-            final_prob = (bert_score + sklearn_score) / 2
-            trace("Logic: Moderate Consensus", "RESULT")
+    Args:
+        texts (List[str]): The postings (already stripped; "" gives an error entry).
+        defer_xai (bool): Queue LIME on the XAI pool instead of running it inline.
+        explain (Optional[List[bool]]): Per posting, whether LIME may run
+            (default: all). Skipped results are not cached.
 
-        # 4. REVIEW LOGIC (With Relaxed "Proven Safe" Threshold)
-        else:
-            max_risk = max(bert_score, sklearn_score)
-            
-            is_proven_safe = (bert_score < 0.10) or (bert_score < 0.20 and sklearn_score < 0.30)
-            suspects_something = False
-            
-            if sklearn_score > 0.45: 
-                suspects_something = True
-            
-            if anomaly_alerts:
-                if is_proven_safe:
-                    trace(f"Anomaly Silenced: Overridden by Safety Logic (BERT {bert_score:.2f})", "INFO")
-                else:
-                    suspects_something = True
-                    trace("Trigger: Anomaly Validated (Models Uncertain)", "INFO")
-            
-            if suspects_something:
-                final_prob = max(max_risk, 0.45)
-                trace("Logic: Suspicion Validated -> Force Review Required", "WARN")
-            else:
-                final_prob = max_risk
-                trace("Logic: System Clean", "RESULT")
+    Returns:
+        List[Dict[str, Any]]: One `/predict`-shaped result per posting.
 
-        trace(f"Final Scoring: {final_prob:.4f}", "RESULT")
+    Raises:
+        ModelsLoadingError: Some postings need the models and they are not ready.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+    hashes = [result_cache_key(t) for t in texts]
+    pending: List[int] = []
 
-        # =========================================================
-        # 🔍 UPDATED XAI GENERATION (ENSEMBLE)
-        # =========================================================
-        lime_insights = []
-        if final_prob > 0.35:
-            try:
-                # Use the new ENSEMBLE predictor that combines both models
-                exp = explainer.explain_instance(
-                    text, 
-                    ensemble_lime_predict,  # <--- CHANGED FROM BERT TO ENSEMBLE
-                    labels=(1,), 
-                    num_features=6, 
-                    num_samples=100
-                )
-                
-                # Filter for significant contributors (>5% impact)
-                lime_insights = [
-                    f"**{feature}** ({round(weight * 100)}% impact)" 
-                    for feature, weight in exp.as_list(label=1) 
-                    if weight > 0.05
-                ]
-                
-                if not lime_insights:
-                    lime_insights = ["Complex pattern detected (No single keyword dominant)"]
-            except Exception as e:
-                trace(f"LIME Failed: {str(e)}", "ERROR")
-                lime_insights = ["AI reasoning unavailable"]
-
-        # Final Response Construction
-        response = {
-            'fraud_probability': round(final_prob * 100, 2),
-            'reasons': heuristic_analysis(text),
-            'advisory': metadata_check(text),
-            'anomaly_analysis': anomaly_alerts,
-            'is_gibberish': False,
-            'xai_insights': lime_insights,
-            'system_logs': list(reversed(trace_logs)),
-            'verdict': "Fake" if final_prob > 0.50 else ("Review" if final_prob > 0.35 else "Real")
-        }
-        
-        cache.set(text_hash, response)
-        return jsonify(response)
+    # 1. EMPTY / CACHE / GIBBERISH / NEAR-DUPLICATE CHECKS
+    unseen: List[int] = []
+    for i, text in enumerate(texts):
+        if not text:
+            results[i] = {'error': 'No input'}
+            continue
+        cached = cache_lookup(hashes[i])
+        if cached:
+            resume_xai_job(hashes[i], text, cached)
+            results[i] = cached
+            continue
+        unseen.append(i)
 
+    language_checks = detect_invalid_language_batch([texts[i] for i in unseen])
+    near_matches: Dict[int, Optional[Dict[str, Any]]] = {}
+    for i, (is_invalid_lang, lang_issues) in zip(unseen, language_checks):
+        if is_invalid_lang:
+            results[i] = build_gibberish_response(lang_issues)
+            cache.set(hashes[i], results[i])
+            continue
+        near_matches[i] = find_near_duplicate(texts[i])
+        if should_short_circuit(near_matches[i]):
+            results[i] = build_near_duplicate_response(texts[i], near_matches[i], defer_xai)
+            cache.set(hashes[i], results[i])
+            continue
+        pending.append(i)
+
+    # 2. RUN MODELS (one batch per stage)
+    if pending:
+        if not ensure_models_loaded(timeout=0):
+            raise ModelsLoadingError("Models are still loading")
+        batch_texts = [texts[i] for i in pending]
+        docs = spacy_docs(batch_texts)
+        with STAGE_SECONDS.time(stage="sklearn"):
+            sklearn_scores = sklearn_predict_proba(batch_texts, docs)
+        with STAGE_SECONDS.time(stage="anomaly"):
+            batch_alerts = [filter_anomaly_alerts(a, log_debug)
+                            for a in anomaly_predict(batch_texts, docs)]
+
+        batch_reasons = [heuristic_analysis(text) for text in batch_texts]
+
+        # Cascade: BERT only scores the postings the cheap stages leave open
+        needs_bert = np.ones(len(pending), dtype=bool)
+        if CASCADE_ENABLED and bert_model is not None and sklearn_pipeline is not None:
+            needs_bert = np.array([
+                cascade_needs_bert(float(score), len(reasons), alerts)
+                for reasons, score, alerts in zip(batch_reasons, sklearn_scores, batch_alerts)
+            ], dtype=bool)
+            CASCADE_TOTAL.inc(int(needs_bert.sum()), decision="bert_run")
+            CASCADE_TOTAL.inc(int((~needs_bert).sum()), decision="bert_skipped")
+        bert_scores = np.array(sklearn_scores, dtype=np.float64)
+        if needs_bert.any():
+            with STAGE_SECONDS.time(stage="bert"):
+                bert_scores[needs_bert] = bert_predict_proba(
+                    [t for t, needed in zip(batch_texts, needs_bert) if needed], BATCH_MAX_SIZE)
+        log_debug(f"Batch Scored: {len(pending)} postings ({int(needs_bert.sum())} with BERT)", "AI")
+
+        for j, i in enumerate(pending):
+            response = assemble_verdict(
+                texts[i], float(bert_scores[j]), float(sklearn_scores[j]),
+                batch_alerts[j], log_debug, defer_xai,
+                explain[i] if explain is not None else True,
+                bert_skipped=not needs_bert[j], reasons=batch_reasons[j]
+            )
+            if not needs_bert[j]:
+                response['skipped_stages'] = ['bert']
+            remember_posting(texts[i], response)
+            response = annotate_known_campaign(response, near_matches[i])
+            response['system_logs'] = []
+            xai_pending = response.get('xai_status') == "pending"
+            if xai_pending:
+                response['xai_job_id'] = hashes[i]
+            if response.get('xai_status') != "skipped":
+                cache.set(hashes[i], response)
+            if xai_pending:
+                schedule_xai_job(hashes[i], texts[i], use_bert=bool(needs_bert[j]))
+            results[i] = response
+
+    for result in results:
+        count_verdict(result)
+    return results
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch() -> Any:
+    """
+    Batch API endpoint. Receives a list of postings and runs every model once
+    over the whole batch. Each result has the same shape as a `/predict` response.
+    """
+    try:
+        data = request.get_json() or {}
+        texts = data.get('texts')
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'No input'}), 400
+        if len(texts) > BATCH_MAX_POSTINGS:
+            return jsonify({'error': f'Too many postings (max {BATCH_MAX_POSTINGS})'}), 400
+        defer_xai = bool(data.get('defer_xai', DEFER_XAI))
+
+        texts = [str(t).strip() if t else "" for t in texts]
+        results = score_batch(texts, defer_xai)
+        for text, result in zip(texts, results):
+            if text:
+                record_scan(result_cache_key(text), result)
+        return jsonify({'results': results})
+
+    except ModelsLoadingError:
+        return models_loading_response()
     except Exception as e:
-        trace(f"FATAL: {str(e)}", "ERROR")
+        log_debug(f"FATAL (batch): {str(e)}", "ERROR")
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/predict/xai/<job_id>')
+def xai_status(job_id: str) -> Any:
+    """Polling endpoint for deferred XAI insights."""
+    job = get_xai_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@app.route('/predict/xai/<job_id>/stream')
+def xai_stream(job_id: str) -> Any:
+    """Server-Sent Events endpoint that pushes deferred XAI insights once ready."""
+    if get_xai_job(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def events() -> Any:
+        with _xai_jobs_lock:
+            job = XAI_JOBS.get(job_id)
+        deadline = time.monotonic() + XAI_STREAM_TIMEOUT
+        if job is not None:
+            while not job['done'].wait(timeout=15):
+                if time.monotonic() >= deadline:
+                    break
+                yield ": keep-alive\n\n"
+        else:
+            # Computed by another worker: watch the shared cache entry instead
+            last_beat = time.monotonic()
+            while (get_xai_job(job_id) or {}).get('status') == "pending" and time.monotonic() < deadline:
+                time.sleep(XAI_STREAM_POLL_SECONDS)
+                if time.monotonic() - last_beat >= 15:
+                    last_beat = time.monotonic()
+                    yield ": keep-alive\n\n"
+
+        state = get_xai_job(job_id) or {'job_id': job_id, 'status': "expired", 'xai_insights': []}
+        yield f"event: xai\ndata: {json.dumps(state)}\n\n"
+
+    return Response(events(), mimetype="text/event-stream", headers={'Cache-Control': 'no-cache'})
+
 # ==========================================
-# 7. DATABASE & AUTH ROUTES
+# 9. DATABASE & AUTH ROUTES
 # ==========================================
 
+# Statements are constant strings, so each pooled connection prepares them once
+# and reuses them from its statement cache.
+SQL_CREATE_USERS = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, 
+        username TEXT UNIQUE NOT NULL, 
+        email TEXT UNIQUE NOT NULL, 
+        password TEXT NOT NULL
+    )
+"""
+# History belongs to the account row, not its username: user ids are never reused
+# (AUTOINCREMENT) and deleting the user cascades to its scans
+SQL_CREATE_HISTORY = """
+    CREATE TABLE IF NOT EXISTS scan_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+        text_hash TEXT NOT NULL,
+        verdict TEXT NOT NULL,
+        score REAL NOT NULL,
+        scanned_at REAL NOT NULL
+    )
+"""
+SQL_INDEX_HISTORY = "CREATE INDEX IF NOT EXISTS scan_history_user ON scan_history (user_id, scanned_at)"
+# Databases created before history was keyed by user id
+SQL_MIGRATE_HISTORY = """
+    INSERT INTO scan_history (user_id, text_hash, verdict, score, scanned_at)
+    SELECT users.id, old.text_hash, old.verdict, old.score, old.scanned_at
+    FROM scan_history_by_name AS old JOIN users ON users.username = old.username
+"""
+SQL_INSERT_USER = "INSERT INTO users (username, email, password) VALUES (?, ?, ?)"
+SQL_SELECT_LOGIN = "SELECT id, password FROM users WHERE username = ?"
+SQL_SELECT_USER_ID = "SELECT id FROM users WHERE username = ?"
+SQL_DELETE_USER = "DELETE FROM users WHERE id = ?"
+# Rows queued for an account that has since been deleted (by any worker) are skipped
+SQL_INSERT_SCAN = ("INSERT INTO scan_history (user_id, text_hash, verdict, score, scanned_at) "
+                   "SELECT ?1, ?2, ?3, ?4, ?5 WHERE EXISTS (SELECT 1 FROM users WHERE id = ?1)")
+SQL_SELECT_SCANS = ("SELECT text_hash, verdict, score, scanned_at FROM scan_history "
+                    "WHERE user_id = ? ORDER BY scanned_at DESC LIMIT ?")
+
+_db_local = threading.local()
+
+def db_connection() -> sqlite3.Connection:
+    """One WAL-mode connection to `DB_NAME` per thread, re-opened after a fork (gunicorn --preload)."""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None or _db_local.pid != os.getpid():
+        conn = sqlite3.connect(DB_NAME, timeout=5.0, check_same_thread=False, cached_statements=32)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        _db_local.conn = conn
+        _db_local.pid = os.getpid()
+    return conn
+
 def init_db() -> None:
-    """Initializes the SQLite database with the users table."""
-    with sqlite3.connect(DB_NAME) as conn:
-        conn.cursor().execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                username TEXT UNIQUE NOT NULL, 
-                email TEXT UNIQUE NOT NULL, 
-                password TEXT NOT NULL
-            )
-        ''')
+    """Initializes the SQLite database with the users and scan history tables."""
+    conn = db_connection()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")  # One worker creates (or migrates) the schema at a time
+        conn.execute(SQL_CREATE_USERS)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(scan_history)")]
+        if 'username' in columns:
+            conn.execute("ALTER TABLE scan_history RENAME TO scan_history_by_name")
+        conn.execute(SQL_CREATE_HISTORY)
+        if 'username' in columns:
+            conn.execute(SQL_MIGRATE_HISTORY)
+            conn.execute("DROP TABLE scan_history_by_name")
+            log_debug("✅ Scan history migrated to per-account keys", "SUCCESS")
+        conn.execute(SQL_INDEX_HISTORY)
 init_db()
 
+auth_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth")
+
+def hash_password(password: str) -> str:
+    """Hashes a password on the auth pool."""
+    return auth_executor.submit(generate_password_hash, password).result()
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Checks a password against its hash on the auth pool."""
+    return auth_executor.submit(check_password_hash, password_hash, password).result()
+
+class ScanHistoryWriter:
+    """
+    Write-behind queue for `scan_history`. `record` only enqueues; a background
+    thread writes up to `batch_size` rows per transaction, at the latest
+    `flush_seconds` after the first row of a batch arrived. When the queue is
+    full rows are dropped (and counted) rather than slowing down `/predict`.
+    """
+    def __init__(self, batch_size: int, flush_seconds: float, max_queued: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Tuple[int, str, str, float, float]]" = queue.Queue(maxsize=max_queued)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._batch_lock = threading.Lock()  # Held while a batch is being gathered and written
+
+    def record(self, user_id: int, text_hash: str, verdict: str, score: float) -> None:
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((user_id, text_hash, verdict, float(score), time.time()))
+        except queue.Full:
+            HISTORY_ROWS_TOTAL.inc(outcome="dropped")
+
+    def pending(self) -> int:
+        """Rows waiting to be written."""
+        return self._queue.qsize()
+
+    def _ensure_worker(self) -> None:
+        # Started lazily so forked workers spawn their own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name="scan-history", daemon=True)
+                self._worker.start()
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            with self._batch_lock:
+                rows = [first]
+                deadline = time.monotonic() + self.flush_seconds
+                while len(rows) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        rows.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                self._write(rows)
+
+    def _write(self, rows: List[Tuple[int, str, str, float, float]]) -> None:
+        try:
+            with db_connection() as conn:
+                conn.executemany(SQL_INSERT_SCAN, rows)
+            HISTORY_ROWS_TOTAL.inc(len(rows), outcome="written")
+        except sqlite3.Error as e:
+            HISTORY_ROWS_TOTAL.inc(len(rows), outcome="failed")
+            log_debug(f"⚠️ Scan history write failed ({len(rows)} rows): {e}", "WARN")
+
+    def flush(self) -> None:
+        """Writes everything queued so far, including a batch the worker is still gathering."""
+        with self._batch_lock:
+            rows = []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if rows:
+                self._write(rows)
+
+scan_history = ScanHistoryWriter(HISTORY_BATCH_SIZE, HISTORY_FLUSH_SECONDS, HISTORY_QUEUE_SIZE)
+atexit.register(scan_history.flush)
+
+metrics_registry.gauge("jobguard_scan_history_queue_depth", "Scan history rows waiting to be written.",
+                       callback=lambda: float(scan_history.pending()))
+
+def session_user_id() -> Optional[int]:
+    """The logged-in user's account id (looked up once for sessions that predate it being stored)."""
+    if 'user' not in session:
+        return None
+    if 'user_id' not in session:
+        row = db_connection().execute(SQL_SELECT_USER_ID, (session['user'],)).fetchone()
+        if row is None:
+            return None
+        session['user_id'] = row[0]
+    return session['user_id']
+
+def record_scan(text_hash: str, response: Dict[str, Any]) -> Dict[str, Any]:
+    """Queues a returned analysis result in the logged-in user's scan history."""
+    user_id = session_user_id() if HISTORY_ENABLED and has_request_context() else None
+    if user_id is not None and 'verdict' in response:
+        scan_history.record(user_id, text_hash, response['verdict'], response.get('fraud_probability', 0))
+    return response
+
 @app.route('/api/signup', methods=['POST'])
 def api_signup() -> Any:
     """Registers a new user."""
     data = request.get_json()
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            hashed_pw = generate_password_hash(data['password'])
-            conn.cursor().execute(
-                "INSERT INTO users (username, email, password) VALUES (?, ?, ?)", 
-                (data['username'], data['email'], hashed_pw)
-            )
-            session['user'] = data['username']
-            return jsonify({'success': True})
+        hashed_pw = hash_password(data['password'])
+        with db_connection() as conn:
+            user_id = conn.execute(SQL_INSERT_USER, (data['username'], data['email'], hashed_pw)).lastrowid
+        session['user'] = data['username']
+        session['user_id'] = user_id
+        return jsonify({'success': True})
     except sqlite3.IntegrityError:
         return jsonify({'error': 'User or email already exists'}), 409
 
@@ -692,19 +2317,30 @@ def api_signup() -> Any:
 def api_login() -> Any:
     """Logs in an existing user."""
     data = request.get_json()
-    with sqlite3.connect(DB_NAME) as conn:
-        row = conn.cursor().execute(
-            "SELECT password FROM users WHERE username = ?", 
-            (data['username'],)
-        ).fetchone()
-        
-        if row and check_password_hash(row[0], data['password']):
-            session['user'] = data['username']
-            session.permanent = data.get('remember', False)
-            return jsonify({'success': True, 'username': data['username']})
+    row = db_connection().execute(SQL_SELECT_LOGIN, (data['username'],)).fetchone()
+
+    if row and verify_password(row[1], data['password']):
+        session['user'] = data['username']
+        session['user_id'] = row[0]
+        session.permanent = data.get('remember', False)
+        return jsonify({'success': True, 'username': data['username']})
             
     return jsonify({'error': 'Invalid credentials'}), 401
 
+@app.route('/api/history')
+def api_history() -> Any:
+    """Returns the logged-in user's most recent scans (written behind, so up to a flush interval late)."""
+    user_id = session_user_id()
+    if user_id is None:
+        return jsonify({'error': 'Unauthorized'}), 401
+    limit = min(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), HISTORY_PAGE_SIZE * 10)
+    rows = db_connection().execute(SQL_SELECT_SCANS, (user_id, limit)).fetchall()
+    return jsonify([
+        {'text_hash': text_hash, 'verdict': verdict, 'fraud_probability': score,
+         'scanned_at': datetime.fromtimestamp(scanned_at).isoformat(timespec='seconds')}
+        for text_hash, verdict, score, scanned_at in rows
+    ])
+
 @app.route('/api/logout', methods=['POST'])
 def api_logout() -> Any:
     """Clears the user session."""
@@ -718,11 +2354,11 @@ def delete_account() -> Any:
         return jsonify({'error': 'Unauthorized'}), 401
     
     try:
-        username = session['user']
-        with sqlite3.connect(DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM users WHERE username = ?", (username,))
-            conn.commit()
+        user_id = session_user_id()
+        if user_id is not None:
+            # Cascades to the scan history; rows still queued in any worker are skipped on insert
+            with db_connection() as conn:
+                conn.execute(SQL_DELETE_USER, (user_id,))
         session.clear()
         return jsonify({'success': True})
     except Exception as e:
@@ -740,6 +2376,59 @@ def get_logs() -> Any:
         return jsonify([])
     return jsonify(list(reversed(SERVER_LOGS)))
 
+@app.route('/healthz')
+def healthz() -> Any:
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz() -> Any:
+    """Readiness probe: per-model load state and timings (503 until warmed up)."""
+    ready = _models_ready.is_set()
+    body = {'ready': ready, 'load_mode': MODEL_LOAD_MODE, 'models': MODEL_STATUS, 'cache': cache_stats()}
+    if model_server is not None:
+        body['model_server'] = model_server_stats()
+    return jsonify(body), (200 if ready else 503)
+
+@app.route('/metrics')
+def metrics() -> Any:
+    """Prometheus scrape endpoint (this worker's stage latencies, cache, LIME and verdict counters)."""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+metrics_registry.gauge("jobguard_cache_hit_ratio", "Result cache hit ratio since start.",
+                       callback=lambda: cache_stats()['hit_ratio'])
+def model_server_stats() -> Optional[Dict[str, Any]]:
+    """Queue depth and batch counters of the model server (None if not in client mode or unreachable)."""
+    if model_server is None:
+        return None
+    try:
+        return model_server.stats()
+    except Exception:
+        return None
+
+metrics_registry.gauge("jobguard_model_server_queue_depth", "Requests in flight on the shared model server.",
+                       callback=lambda: (model_server_stats() or {}).get('queue_depth'))
+metrics_registry.gauge("jobguard_models_ready", "1 once every model is loaded and warmed up.",
+                       callback=lambda: float(_models_ready.is_set()))
+
+@app.before_request
+def track_request_start() -> None:
+    g.metrics_route = request.url_rule.rule if request.url_rule else "unmatched"
+    g.metrics_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc(route=g.metrics_route)
+
+@app.after_request
+def track_request_status(response: Response) -> Response:
+    REQUESTS_TOTAL.inc(route=g.get('metrics_route', "unmatched"), status=str(response.status_code))
+    return response
+
+@app.teardown_request
+def track_request_end(exc: Optional[BaseException]) -> None:
+    route = g.pop('metrics_route', None)
+    if route is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.pop('metrics_start'), route=route)
+        REQUESTS_IN_FLIGHT.dec(route=route)
+
 @app.route('/')
 def home() -> Any:
     """Renders the login page."""
@@ -752,5 +2441,58 @@ def dashboard() -> Any:
         return redirect(url_for('home'))
     return render_template('index.html', username=session['user'])
 
+# ==========================================
+# 10. STARTUP
+# ==========================================
+
+_preload_pid: Optional[int] = None  # The process that preloaded the models (the gunicorn master)
+
+def _after_fork() -> None:
+    """
+    Runs in every worker forked from a preloaded master. The master's thread
+    pool threads do not exist here and ONNX Runtime sessions do not survive a
+    fork, so both are recreated; the models themselves stay shared.
+
+    The fork hook fires in every child, so processes forked by a worker (e.g.
+    Spacy `nlp.pipe` processes with N_PROCESS > 1) are skipped: only direct
+    children of the preloading process are workers.
+    """
+    if os.getppid() != _preload_pid:
+        return
+    global stage_executor, xai_executor, auth_executor, bert_backend
+    stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="stage")
+    for batcher in (bert_batcher, sklearn_batcher, anomaly_batcher):
+        batcher.executor = stage_executor
+    xai_executor = ThreadPoolExecutor(max_workers=XAI_WORKERS, thread_name_prefix="xai")
+    auth_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="auth")
+    if isinstance(bert_backend, OnnxBertBackend):
+        bert_backend = load_bert_backend(BERT_BACKEND)
+    if WARMUP_ENABLED and _models_ready.is_set():
+        threading.Thread(target=_timed_load, args=("warmup", warm_up_models), name="warmup", daemon=True).start()
+
+def preload_models() -> None:
+    """
+    `gunicorn --preload` mode: loads every model in the master before it forks,
+    so workers share the model pages copy-on-write. Nothing runs inference in
+    the master (threads, OpenMP and ONNX Runtime pools do not survive a fork);
+    each worker warms up after the fork.
+    """
+    global _loading_started, _preload_pid
+    with _loading_lock:
+        if _loading_started:
+            return
+        _loading_started = True
+    _load_all_models(warm_up=False)
+    _preload_pid = os.getpid()
+    os.register_at_fork(after_in_child=_after_fork)
+
+# Triggered after every definition above, since the loaders' warm-up calls into them
+if MODEL_LOAD_MODE == "preload":
+    preload_models()
+elif MODEL_LOAD_MODE == "blocking":
+    start_model_loading(block=True)
+elif MODEL_LOAD_MODE == "background":
+    start_model_loading()
+
 if __name__ == '__main__':
     app.run(debug=True)
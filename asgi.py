@@ -0,0 +1,364 @@
+import asyncio
+import io
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from itsdangerous import BadSignature
+from werkzeug.http import parse_cookie
+
+import app as jobguard
+
+# --- CONFIGURATION ---
+# Inference requests (POST /predict, /predict/batch) wait in a bounded queue in
+# front of INFERENCE_WORKERS threads; every other route is bridged straight through.
+INFERENCE_PATHS = ('/predict', '/predict/batch')
+INFERENCE_WORKERS = int(os.environ.get("JOBGUARD_INFERENCE_WORKERS", "4"))
+QUEUE_SIZE = int(os.environ.get("JOBGUARD_QUEUE_SIZE", "64"))               # Full -> 503
+QUEUE_PER_USER = int(os.environ.get("JOBGUARD_QUEUE_PER_USER", "8"))        # One user's share -> 429
+QUEUE_TIMEOUT_S = float(os.environ.get("JOBGUARD_QUEUE_TIMEOUT", "30"))     # Waited too long -> 503
+PASSTHROUGH_THREADS = int(os.environ.get("JOBGUARD_PASSTHROUGH_THREADS", "32"))  # Pages, auth, SSE streams
+MAX_BODY_BYTES = int(os.environ.get("JOBGUARD_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+
+
+# ---------------------
+
+flask_app = jobguard.app
+
+QUEUE_REJECTED_TOTAL = jobguard.metrics_registry.counter(
+    "jobguard_queue_rejected_total", "Inference requests shed at admission (user_limit, queue_full, expired).", ["reason"])
+QUEUE_WAIT_SECONDS = jobguard.metrics_registry.histogram(
+    "jobguard_queue_wait_seconds", "Time inference requests spent queued before a worker picked them up.")
+
+
+# ==========================================
+# 1. ASGI -> WSGI BRIDGE
+# ==========================================
+def wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """Builds the WSGI environ of an ASGI HTTP scope (PEP 3333 latin-1 strings)."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ: Dict[str, Any] = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': str(client[0]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name, value = raw_name.decode('latin-1').upper().replace('-', '_'), raw_value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = name if name == 'CONTENT_TYPE' else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class WsgiBridge:
+    """
+    One request running through the Flask app in a worker thread. The status,
+    headers and body chunks are handed to the event loop as they are produced,
+    so streaming responses (the XAI SSE endpoint) keep streaming.
+    """
+    def __init__(self, environ: Dict[str, Any], loop: asyncio.AbstractEventLoop, user: str = ""):
+        self.environ = environ
+        self.user = user
+        self.loop = loop
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.cancelled = threading.Event()  # Client went away: stop producing
+        self.enqueued_at = time.monotonic()
+
+    def _emit(self, *message: Any) -> None:
+        self.loop.call_soon_threadsafe(self.messages.put_nowait, message)
+
+    def run(self) -> None:
+        """Calls the WSGI app (in the calling thread) and forwards its output."""
+        status_headers: List[Any] = []
+        sent = False
+
+        def flush_start() -> None:
+            nonlocal sent
+            if not sent:  # Headers go out with the first body chunk
+                self._emit('start', *status_headers)
+                sent = True
+
+        def write(data: bytes) -> None:  # Legacy WSGI write() callable
+            flush_start()
+            self._emit('body', data)
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable[[bytes], None]:
+            status_headers[:] = [int(status.split(' ', 1)[0]), headers]
+            return write
+
+        try:
+            result = flask_app(self.environ, start_response)
+            try:
+                for chunk in result:
+                    if self.cancelled.is_set():
+                        break
+                    flush_start()
+                    if chunk:
+                        self._emit('body', chunk)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            flush_start()
+        except Exception as e:
+            jobguard.log_debug(f"ASGI Bridge Error: {e}", "ERROR")
+            if not sent:
+                self.reject(500, {'error': str(e)})
+                return
+        self._emit('end')
+
+    def reject(self, status: int, body: Dict[str, Any], retry_after: Optional[int] = None) -> None:
+        """Answers without running the app (same JSON error shape as the Flask routes)."""
+        headers = [('Content-Type', 'application/json')]
+        if retry_after is not None:
+            headers.append(('Retry-After', str(retry_after)))
+        self._emit('start', status, headers)
+        self._emit('body', json.dumps(body).encode('utf-8'))
+        self._emit('end')
+
+    async def relay(self, send: Callable[..., Any]) -> None:
+        """Sends the bridged response to the ASGI server."""
+        while True:
+            kind, *payload = await self.messages.get()
+            if kind == 'start':
+                status, headers = payload
+                await send({'type': 'http.response.start', 'status': status,
+                            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+            elif kind == 'body':
+                await send({'type': 'http.response.body', 'body': bytes(payload[0]), 'more_body': True})
+            elif kind == 'drop':
+                return  # The client is gone; nothing more to send
+            else:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                return
+
+
+# ==========================================
+# 2. FAIR INFERENCE QUEUE
+# ==========================================
+class FairQueue:
+    """
+    Bounded queue of pending inference requests with one FIFO per user.
+    Workers take requests round-robin across users, so a user with many
+    queued postings only gets every n-th slot while others are waiting.
+    """
+    def __init__(self, capacity: int = QUEUE_SIZE, per_user: int = QUEUE_PER_USER):
+        self.capacity = capacity
+        self.per_user = per_user
+        self._users: 'OrderedDict[str, Deque[WsgiBridge]]' = OrderedDict()  # Round-robin order
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, bridge: WsgiBridge) -> Optional[str]:
+        """Queues a request. Returns None, or why it was refused ('user_limit' / 'queue_full')."""
+        with self._cond:
+            pending = self._users.get(bridge.user)
+            if pending is not None and len(pending) >= self.per_user:
+                return "user_limit"
+            if self._size >= self.capacity:
+                return "queue_full"
+            if pending is None:
+                pending = self._users[bridge.user] = deque()
+            pending.append(bridge)
+            self._size += 1
+            self._cond.notify()
+            return None
+
+    def get(self) -> Optional[WsgiBridge]:
+        """Blocks for the next request (the head of the next user's FIFO); None means shut down."""
+        with self._cond:
+            while not self._size:
+                self._cond.wait()
+            user, pending = next(iter(self._users.items()))
+            bridge = pending.popleft()
+            del self._users[user]
+            if pending:
+                self._users[user] = pending  # To the back of the rotation
+            self._size -= 1
+            return bridge
+
+    def put_stop(self) -> None:
+        with self._cond:
+            self._users.setdefault("", deque()).append(None)  # type: ignore[arg-type]
+            self._size += 1
+            self._cond.notify()
+
+
+class InferenceScheduler:
+    """The fair queue plus the worker threads that drain it into the Flask app."""
+    def __init__(self, workers: int = INFERENCE_WORKERS):
+        self.workers = max(1, workers)
+        self.queue = FairQueue()
+        self.service_seconds = 1.0  # Moving average of one request, for Retry-After
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"jobguard-inference-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            jobguard.log_debug(f"ASGI Inference Queue: {self.workers} workers, {self.queue.capacity} slots", "INIT")
+
+    def stop(self) -> None:
+        with self._lock:
+            for _ in self._threads:
+                self.queue.put_stop()
+            self._threads = []
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        return max(1, math.ceil(len(self.queue) * self.service_seconds / self.workers))
+
+    def submit(self, bridge: WsgiBridge) -> bool:
+        self.start()
+        refused = self.queue.put(bridge)
+        if refused is None:
+            return True
+        QUEUE_REJECTED_TOTAL.inc(reason=refused)
+        if refused == "user_limit":
+            bridge.reject(429, {'error': 'Too many pending requests for this user'}, self.retry_after())
+        else:
+            bridge.reject(503, {'error': 'Server busy, try again later'}, self.retry_after())
+        return False
+
+    def _work(self) -> None:
+        while True:
+            bridge = self.queue.get()
+            if bridge is None:
+                return
+            if bridge.cancelled.is_set():
+                continue
+            waited = time.monotonic() - bridge.enqueued_at
+            QUEUE_WAIT_SECONDS.observe(waited)
+            if waited > QUEUE_TIMEOUT_S:
+                QUEUE_REJECTED_TOTAL.inc(reason="expired")
+                bridge.reject(503, {'error': 'Server busy, try again later'}, self.retry_after())
+                continue
+            start = time.perf_counter()
+            bridge.run()
+            self.service_seconds = 0.9 * self.service_seconds + 0.1 * (time.perf_counter() - start)
+
+
+scheduler = InferenceScheduler()
+passthrough = ThreadPoolExecutor(PASSTHROUGH_THREADS, thread_name_prefix="jobguard-asgi")
+
+jobguard.metrics_registry.gauge("jobguard_queue_depth", "Inference requests waiting for a worker.",
+                                callback=lambda: float(len(scheduler.queue)))
+
+
+# ==========================================
+# 3. ASGI APPLICATION
+# ==========================================
+def session_user(environ: Dict[str, Any]) -> str:
+    """Fair-scheduling key: the logged-in session user, else the client address."""
+    cookie = parse_cookie(environ).get(flask_app.config['SESSION_COOKIE_NAME'])
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if cookie and serializer is not None:
+        try:
+            max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+            user = serializer.loads(cookie, max_age=max_age).get('user')
+            if user:
+                return f"user:{user}"
+        except BadSignature:
+            pass
+    return f"addr:{environ.get('REMOTE_ADDR', '')}"
+
+
+async def read_body(receive: Callable[..., Any]) -> Tuple[Optional[bytes], bool]:
+    """
+    Returns:
+        Tuple[Optional[bytes], bool]: The request body (None if the client
+        disconnected first) and whether it was cut off at MAX_BODY_BYTES.
+    """
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None, False
+        chunks.append(message.get('body', b''))
+        size += len(chunks[-1])
+        if size > MAX_BODY_BYTES:
+            return b'', True
+        if not message.get('more_body'):
+            return b''.join(chunks), False
+
+
+async def watch_disconnect(receive: Callable[..., Any], bridge: WsgiBridge) -> None:
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    bridge.cancelled.set()
+    # Ends relay() even if the request is still queued (workers skip cancelled bridges)
+    bridge.messages.put_nowait(('drop',))
+
+
+async def lifespan(receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            scheduler.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            scheduler.stop()
+            passthrough.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+    """
+    ASGI entry point (`uvicorn asgi:application`). Serves the Flask app with the
+    same routes and JSON contract; POST /predict and /predict/batch go through
+    the fair inference queue and are shed with 429/503 + Retry-After when full.
+    """
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    loop = asyncio.get_running_loop()
+    body, too_large = await read_body(receive)
+    if body is None:
+        return
+    environ = wsgi_environ(scope, body)
+    bridge = WsgiBridge(environ, loop, session_user(environ))
+    if too_large:
+        bridge.reject(413, {'error': f'Request body too large (max {MAX_BODY_BYTES} bytes)'})
+    elif scope['method'] == 'POST' and scope['path'] in INFERENCE_PATHS:
+        scheduler.submit(bridge)
+    else:
+        loop.run_in_executor(passthrough, bridge.run)
+
+    watcher = asyncio.ensure_future(watch_disconnect(receive, bridge))
+    try:
+        await bridge.relay(send)
+    finally:
+        bridge.cancelled.set()
+        watcher.cancel()
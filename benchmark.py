@@ -0,0 +1,480 @@
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from wordfreq import top_n_list
+
+# Models are only loaded by the suites that need them; every request is really
+# scored (no result cache) and benchmark posts don't grow the near-duplicate index.
+os.environ.setdefault("JOBGUARD_LOAD_MODE", "lazy")
+os.environ.setdefault("JOBGUARD_CACHE_BACKEND", "null")
+os.environ.setdefault("JOBGUARD_NEARDUP_LEARN", "0")
+
+import app
+from parity_check import load_posts
+from rule_engine import RuleSet
+
+# --- CONFIGURATION ---
+SEED = 42
+# Word-count ranges of the synthetic corpora (the "results" corpus replays results.csv)
+SYNTHETIC_LENGTHS = {"short": (20, 80), "medium": (150, 400), "long": (600, 1500)}
+CONCURRENCY_LEVELS = [1, 4, 16]
+
+
+# ---------------------
+
+# ==========================================
+# 1. CORPUS
+# ==========================================
+def build_long_posts(posts: List[str], count: int, min_words: int, max_words: int, seed: int = SEED) -> List[str]:
+    """Concatenates random posts until each synthetic posting reaches a word count in [min_words, max_words]."""
+    rng = random.Random(seed)
+    long_posts = []
+    for _ in range(count):
+        target = rng.randint(min_words, max_words)
+        words: List[str] = []
+        while len(words) < target:
+            words.extend(rng.choice(posts).split())
+        long_posts.append(" ".join(words[:target]))
+    return long_posts
+
+
+# ==========================================
+# 2. BERT: TRUNCATE-AND-PAD vs BUCKETED WINDOWS
+# ==========================================
+def legacy_bert_predict_proba(texts: List[str], batch_size: int) -> np.ndarray:
+    """The original behaviour: batches in input order, padded to the longest text, truncated at 512 tokens."""
+    probs = np.empty(len(texts))
+    for i in range(0, len(texts), batch_size):
+        encoded = app.bert_tokenizer(texts[i:i + batch_size], return_tensors="np", padding=True,
+                                     truncation=True, max_length=app.BERT_MAX_LENGTH)
+        logits = app.bert_backend.logits(dict(encoded))
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs[i:i + batch_size] = exp[:, 1] / exp.sum(axis=1)
+    return probs
+
+
+def bench_windows(texts: List[str], batch_size: int) -> List[Dict[str, Any]]:
+    """Times the legacy path, bucketed truncation and bucketed sliding windows on the same texts."""
+    modes = {
+        "truncate+pad (legacy)": lambda: legacy_bert_predict_proba(texts, batch_size),
+        "truncate+buckets": lambda: app.bert_predict_proba(texts, batch_size, chunked=False),
+        f"windows+buckets ({app.BERT_REDUCER})": lambda: app.bert_predict_proba(texts, batch_size, chunked=True),
+    }
+
+    rows = []
+    reference = None
+    for name, run in modes.items():
+        start = time.perf_counter()
+        probs = run()
+        seconds = time.perf_counter() - start
+        if reference is None:
+            reference = probs
+        rows.append({
+            'mode': name,
+            'posts_per_sec': len(texts) / seconds,
+            'seconds': seconds,
+            'agreement': float(np.mean((probs > 0.5) == (reference > 0.5))),
+        })
+    return rows
+
+
+def run_windows_suite(posts: List[str], batch_size: int, count: int) -> None:
+    """Benchmarks the BERT stage on short results.csv posts and on synthetic long postings."""
+    if not app.bert_backend:
+        print("❌ BERT model not loaded.")
+        return
+
+    corpora = {
+        "results.csv": posts[:count],
+        "long (300-900 words)": build_long_posts(posts, count, 300, 900),
+    }
+
+    print("\n" + "=" * 72)
+    print(f"BERT THROUGHPUT: TRUNCATE-AND-PAD vs LENGTH-BUCKETED WINDOWS (batch {batch_size})")
+    print("=" * 72)
+    for corpus_name, texts in corpora.items():
+        windows, owners = app.encode_bert_windows(texts, chunked=True)
+        over_limit = int(np.sum(np.bincount(owners, minlength=len(texts)) > 1))
+        print(f"\n[{corpus_name}] {len(texts)} posts -> {len(windows)} windows ({over_limit} longer than {app.BERT_MAX_LENGTH} tokens)")
+        for row in bench_windows(texts, batch_size):
+            print(f"  {row['mode']:<28} | {row['posts_per_sec']:>8.1f} posts/s | "
+                  f"{row['seconds']:>7.2f} s | agreement {row['agreement'] * 100:>6.2f}%")
+
+
+# ==========================================
+# 3. RULES: PER-RULE SCANS vs SINGLE-PASS ENGINE
+# ==========================================
+def legacy_evaluate(rules: List[Dict[str, Any]], text: str) -> List[str]:
+    """The original approach: one `in` test per keyword and one `re.search` per pattern."""
+    text_lower = text.lower()
+    fired = []
+    for rule in rules:
+        if 'pattern' in rule:
+            ok = re.search(rule['pattern'], text_lower) is not None
+        else:
+            groups = rule.get('all', []) + ([rule['any']] if rule.get('any') else [])
+            ok = all(any(k in text_lower for k in group) for group in groups) \
+                and not any(k in text_lower for k in rule.get('none', []))
+        if ok:
+            fired.append(rule['message'])
+    return fired
+
+
+def synthetic_rules(base: List[Dict[str, Any]], total: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """Pads a rule set with single-keyword rules drawn from common English words (so some of them fire)."""
+    rng = random.Random(seed)
+    vocab = [w for w in top_n_list('en', 20000) if len(w) >= 5 and w.isalpha()]
+    extra = rng.sample(vocab, min(max(total - len(base), 0), len(vocab)))
+    return base + [{'any': [word], 'message': f"kw:{word}"} for word in extra]
+
+
+def bench_rules(rules: List[Dict[str, Any]], texts: List[str]) -> Dict[str, float]:
+    """Mean microseconds per post for the legacy loop, per-keyword scans and the automaton (outputs must agree)."""
+    modes = {
+        "legacy": lambda t: legacy_evaluate(rules, t),
+        "keywords": RuleSet('bench', rules, automaton=False).evaluate,
+        "automaton": RuleSet('bench', rules, automaton=True).evaluate,
+    }
+    for text in texts:
+        expected = legacy_evaluate(rules, text)
+        assert all(run(text) == expected for run in modes.values()), "rule engine diverged from legacy scan"
+
+    timings = {}
+    for name, run in modes.items():
+        start = time.perf_counter()
+        for text in texts:
+            run(text)
+        timings[name] = (time.perf_counter() - start) * 1e6 / len(texts)
+    return timings
+
+
+def run_rules_suite(posts: List[str], count: int) -> None:
+    """Benchmarks rule evaluation cost against post length and rule count."""
+    base = app.rule_engine.rule_sets['heuristics'].rules + app.rule_engine.rule_sets['metadata'].rules
+    lengths = [50, 200, 1000, 4000]
+    rule_counts = [len(base), 50, 200, 1000]
+
+    print("\n" + "=" * 72)
+    print("RULES: PER-RULE SCANS vs SINGLE-PASS ENGINE (us/post, identical output)")
+    print("=" * 72)
+    print(f"{'Rules':>6} | {'Words':>6} | {'Legacy':>9} | {'Keywords':>9} | {'Automaton':>9} | {'Engine picks':>12}")
+    print("-" * 72)
+    for total in rule_counts:
+        rules = synthetic_rules(base, total)
+        picks = "automaton" if RuleSet('bench', rules).scanner.automaton else "keywords"
+        for words in lengths:
+            timings = bench_rules(rules, build_long_posts(posts, count, words, words))
+            print(f"{len(rules):>6} | {words:>6} | {timings['legacy']:>9.1f} | {timings['keywords']:>9.1f} | "
+                  f"{timings['automaton']:>9.1f} | {picks:>12}")
+
+
+# ==========================================
+# 4. STAGES: PER-STAGE LATENCY, CONCURRENCY & MEMORY
+# ==========================================
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def latency_summary(latencies_ms: List[float], seconds: float) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        'count': len(latencies_ms),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(np.mean(latencies_ms)), 3),
+        'posts_per_sec': round(len(latencies_ms) / seconds, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def stage_functions(texts: List[str]) -> Dict[str, Optional[Callable[[int], Any]]]:
+    """
+    One callable per `predict()` stage, each scoring post `i` on its own (None
+    if the stage's model isn't loaded). Downstream stages get their inputs
+    (Spacy docs, model scores) precomputed so only the stage itself is timed.
+    """
+    noop = lambda msg, lvl="INFO": None
+    docs = app.spacy_docs(texts)
+    bert_scores = app.bert_predict_proba(texts)
+    sklearn_scores = app.sklearn_predict_proba(texts, docs)
+    return {
+        'language': lambda i: app.detect_invalid_language(texts[i]),
+        'heuristics': lambda i: (app.heuristic_analysis(texts[i]), app.metadata_check(texts[i])),
+        'spacy': lambda i: app.nlp_engine(texts[i]),
+        'bert': (lambda i: app.bert_predict_proba([texts[i]])) if app.bert_backend else None,
+        'sklearn': (lambda i: app.sklearn_predict_proba([texts[i]], [docs[i]])) if app.sklearn_pipeline else None,
+        'anomaly': (lambda i: app.anomaly_explain_batch(app.anomaly_features([texts[i]], [docs[i]])))
+        if app.anomaly_model else None,
+        # Score fusion and response assembly (runs the heuristics again, but not LIME)
+        'scoring': lambda i: app.assemble_verdict(texts[i], float(bert_scores[i]), float(sklearn_scores[i]), [],
+                                                  noop, explain=False),
+        'lime': (lambda i: app.generate_xai_insights(texts[i], noop)) if app.explainer else None,
+    }
+
+
+def time_calls(fn: Callable[[int], Any], count: int) -> Dict[str, float]:
+    fn(0)  # Warm-up
+    latencies = []
+    start = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latency_summary(latencies, time.perf_counter() - start)
+
+
+def bench_end_to_end(texts: List[str], concurrency: int) -> Dict[str, float]:
+    """
+    Replays the posts through `POST /predict` (LIME inline, as served) from
+    `concurrency` threads, each with its own test client, so concurrent
+    requests share micro-batches like they do under gunicorn --threads.
+    """
+    latencies: List[float] = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def call(text: str) -> None:
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.app.test_client()
+        t0 = time.perf_counter()
+        resp = client.post('/predict', json={'text': text, 'defer_xai': False})
+        elapsed = (time.perf_counter() - t0) * 1000
+        if resp.status_code != 200:
+            raise RuntimeError(f"/predict returned {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+        with lock:
+            latencies.append(elapsed)
+
+    call(texts[0])  # Warm-up
+    latencies.clear()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, texts))
+    summary = latency_summary(latencies, time.perf_counter() - start)
+    summary['concurrency'] = concurrency
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stages_suite(posts: List[str], corpus: str, count: int, lime_count: int, e2e_count: int,
+                     concurrency: List[int], json_path: Optional[str] = None,
+                     compare_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Times every `predict()` stage per post and the whole route at several
+    concurrency levels, and optionally writes the results as JSON (with the
+    commit and serving config) for comparison between commits.
+    """
+    if corpus == "results":
+        texts = posts[:count]
+    else:
+        texts = build_long_posts(posts, count, *SYNTHETIC_LENGTHS[corpus])
+    words = [len(t.split()) for t in texts]
+    rss_start = peak_rss_mb()
+
+    stages: Dict[str, Any] = {}
+    for name, fn in stage_functions(texts).items():
+        if fn is None:
+            stages[name] = None
+            continue
+        stages[name] = time_calls(fn, min(lime_count, len(texts)) if name == "lime" else len(texts))
+    end_to_end = [bench_end_to_end(texts[:e2e_count], level) for level in concurrency]
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': {
+            'bert_backend': app.BERT_BACKEND, 'bert_chunking': app.BERT_CHUNKING,
+            'micro_batching': app.MICRO_BATCHING, 'spacy_vectors_only': app.SPACY_VECTORS_ONLY,
+            'cpu_count': os.cpu_count(),
+        },
+        'corpus': {'name': corpus, 'posts': len(texts), 'words_p50': int(np.median(words)), 'words_max': max(words)},
+        'stages': stages,
+        'end_to_end': end_to_end,
+        'rss_mb': {'start_peak': round(rss_start, 1), 'peak': round(peak_rss_mb(), 1)},
+    }
+    baseline = None
+    if compare_path:
+        with open(compare_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print("\n" + "=" * 72)
+    print(f"STAGE LATENCY ({corpus}: {len(texts)} posts, median {report['corpus']['words_p50']} words)")
+    print("=" * 72)
+    print(f"{'Stage':<10} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'posts/s':>8} | {'vs base p50':>11}")
+    print("-" * 72)
+    for name, row in stages.items():
+        if row is None:
+            print(f"{name:<10} | {'not loaded':>8}")
+            continue
+        old = (baseline or {}).get('stages', {}).get(name)
+        delta = f"{row['p50_ms'] / old['p50_ms']:>10.2f}x" if old and old['p50_ms'] else ""
+        print(f"{name:<10} | {row['p50_ms']:>8.2f} | {row['p95_ms']:>8.2f} | {row['p99_ms']:>8.2f} | "
+              f"{row['posts_per_sec']:>8.1f} | {delta:>11}")
+    print("-" * 72)
+    for row in end_to_end:
+        print(f"{'e2e x' + str(row['concurrency']):<10} | {row['p50_ms']:>8.2f} | {row['p95_ms']:>8.2f} | "
+              f"{row['p99_ms']:>8.2f} | {row['posts_per_sec']:>8.1f} |")
+    print(f"Peak RSS: {report['rss_mb']['peak']:.0f} MB (models loaded: {report['rss_mb']['start_peak']:.0f} MB)")
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {json_path}")
+    return report
+
+
+# ==========================================
+# 5. MEMORY: PER-WORKER UNIQUE vs SHARED RSS
+# ==========================================
+def smaps_rollup(pid: int) -> Dict[str, float]:
+    """
+    RSS split of one process in MB: `unique` pages are mapped by this process
+    only, `shared` pages also by others (preloaded models, mapped weight files),
+    and `pss` charges each shared page proportionally (sums to real usage).
+    """
+    fields: Dict[str, float] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': fields.get('Rss', 0.0),
+        'unique': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+        'shared': fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0),
+        'pss': fields.get('Pss', 0.0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    children: List[int] = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children += [int(c) for c in f.read().split()]
+    return children
+
+
+def fork_workers(posts: List[str], count: int, requests: int) -> List[int]:
+    """
+    Forks `count` workers from this (preloaded) process, like gunicorn does.
+    Each scores `requests` postings through `/predict` and then waits to be
+    measured; returns once all of them are done.
+    """
+    workers: List[Tuple[int, int]] = []
+    for i in range(count):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                client = app.app.test_client()
+                for j in range(requests):
+                    client.post('/predict', json={'text': posts[(i * requests + j) % len(posts)]})
+                os.write(write_fd, b'1')
+                signal.pause()
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        workers.append((pid, read_fd))
+    for _, fd in workers:
+        os.read(fd, 1)
+        os.close(fd)
+    return [pid for pid, _ in workers]
+
+
+def run_memory_suite(posts: List[str], workers: int, requests: int, master_pid: Optional[int] = None,
+                     mmap: bool = True) -> List[Dict[str, Any]]:
+    """
+    Reports unique vs shared RSS per worker. With `master_pid` it measures a
+    running server (e.g. the gunicorn master and its workers); otherwise it
+    preloads the models here and forks `workers` workers to measure.
+    """
+    forked: List[int] = []
+    if master_pid:
+        processes = [("master", master_pid)] + [(f"worker {i}", pid) for i, pid in enumerate(child_pids(master_pid))]
+    else:
+        app.MMAP_WEIGHTS = mmap
+        app.preload_models()
+        forked = fork_workers(posts, workers, requests)
+        processes = [("master", os.getpid())] + [(f"worker {i}", pid) for i, pid in enumerate(forked)]
+
+    try:
+        rows = [{'process': name, 'pid': pid, **smaps_rollup(pid)} for name, pid in processes]
+    finally:
+        for pid in forked:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+    print("\n" + "=" * 72)
+    mode = f"pid {master_pid}" if master_pid else f"preload, mmap {'on' if mmap else 'off'}, {requests} requests/worker"
+    print(f"MEMORY PER PROCESS ({mode})")
+    print("=" * 72)
+    print(f"{'Process':<10} | {'PID':>7} | {'RSS MB':>8} | {'Unique MB':>9} | {'Shared MB':>9} | {'PSS MB':>8}")
+    print("-" * 72)
+    for row in rows:
+        print(f"{row['process']:<10} | {row['pid']:>7} | {row['rss']:>8.1f} | {row['unique']:>9.1f} | "
+              f"{row['shared']:>9.1f} | {row['pss']:>8.1f}")
+    print("-" * 72)
+    worker_rows = rows[1:] or rows
+    print(f"Per worker: {np.mean([r['unique'] for r in worker_rows]):.1f} MB unique, "
+          f"{np.mean([r['shared'] for r in worker_rows]):.1f} MB shared")
+    print(f"Total: {sum(r['rss'] for r in rows):.0f} MB summed RSS, {sum(r['pss'] for r in rows):.0f} MB actually used (PSS)")
+    return rows
+
+
+# ==========================================
+# 6. ENTRY POINT
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JobGuard inference benchmarks.")
+    parser.add_argument("suite", choices=["windows", "rules", "stages", "memory"], help="Benchmark suite to run.")
+    parser.add_argument("--count", type=int, default=200, help="Posts per corpus.")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--corpus", choices=["results"] + list(SYNTHETIC_LENGTHS), default="results",
+                        help="stages: replay results.csv or a synthetic corpus of controlled length.")
+    parser.add_argument("--lime-count", type=int, default=20, help="stages: posts explained by the LIME stage.")
+    parser.add_argument("--e2e-count", type=int, default=50, help="stages: /predict requests per concurrency level.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=CONCURRENCY_LEVELS)
+    parser.add_argument("--json", help="stages: write the results to this JSON file.")
+    parser.add_argument("--compare", help="stages: earlier JSON results to compare p50 latencies against.")
+    parser.add_argument("--workers", type=int, default=2, help="memory: workers to fork from the preloaded models.")
+    parser.add_argument("--requests", type=int, default=10, help="memory: /predict requests per forked worker.")
+    parser.add_argument("--pid", type=int, help="memory: measure this running master and its workers instead.")
+    parser.add_argument("--no-mmap", action="store_true", help="memory: load the weights into private memory.")
+    args = parser.parse_args()
+
+    corpus = load_posts()
+    if args.suite == "windows":
+        app.ensure_models_loaded(timeout=None)
+        run_windows_suite(corpus, args.batch_size, args.count)
+    elif args.suite == "rules":
+        run_rules_suite(corpus, args.count)
+    elif args.suite == "stages":
+        app.ensure_models_loaded(timeout=None)
+        run_stages_suite(corpus, args.corpus, args.count, args.lime_count, args.e2e_count,
+                         args.concurrency, args.json, args.compare)
+    elif args.suite == "memory":
+        run_memory_suite(corpus, args.workers, args.requests, args.pid, mmap=not args.no_mmap)
@@ -0,0 +1,253 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+
+# --- CONFIGURATION ---
+CHUNK_SIZE = 64               # Postings per worker task (one model batch)
+CHECKPOINT_SUFFIX = '.checkpoint'
+OUTPUT_COLUMNS = ['ID', 'Type', 'Expected', 'Predicted', 'Confidence', 'Correct', 'Input_Text', 'Explanation']
+# Worker defaults (the environment wins): models load in the worker, results are
+# not pushed into the shared serving cache and the near-duplicate index isn't grown.
+WORKER_ENV = {
+    "JOBGUARD_LOAD_MODE": "lazy",
+    "JOBGUARD_CACHE_BACKEND": "simple",
+    "JOBGUARD_NEARDUP_LEARN": "0",
+    "JOBGUARD_MICRO_BATCHING": "0",
+    "JOBGUARD_WARMUP": "0",
+}
+
+
+# ---------------------
+
+# ==========================================
+# 1. STREAMING INPUT / OUTPUT
+# ==========================================
+def is_jsonl(path: str) -> bool:
+    return path.lower().endswith(('.jsonl', '.ndjson', '.json'))
+
+
+def read_postings(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields rows in the results.csv layout (`Input_Text` plus optional `ID`,
+    `Type`, `Expected`) from a CSV or JSONL file, one at a time. JSONL rows
+    may use `text` instead of `Input_Text`.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if not is_jsonl(path):
+            csv.field_size_limit(sys.maxsize)
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if 'Input_Text' not in row:
+                    row['Input_Text'] = row.get('text', '')
+                yield row
+
+
+def to_record(row: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps an API result onto the results.csv columns (Confidence is the fraud probability, 0-1)."""
+    verdict = result.get('verdict')
+    predicted = verdict.upper() if verdict else "ERROR"
+    expected = str(row.get('Expected') or '').upper()
+    explanation = result.get('error') or "; ".join(
+        result.get('reasons', []) + result.get('anomaly_analysis', []) + result.get('xai_insights', [])
+    )
+    return {
+        'ID': row.get('ID', ''),
+        'Type': row.get('Type', ''),
+        'Expected': expected,
+        'Predicted': predicted,
+        'Confidence': round(result.get('fraud_probability', 0) / 100, 4),
+        'Correct': str(predicted == expected).upper() if expected else '',
+        'Input_Text': row.get('Input_Text', ''),
+        'Explanation': explanation,
+    }
+
+
+def encode_records(records: List[Dict[str, Any]], jsonl: bool, header: bool) -> bytes:
+    """CSV rows in the results.csv layout, or JSONL records that also carry the full API result."""
+    if jsonl:
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode('utf-8')
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=OUTPUT_COLUMNS, extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buf.getvalue().encode('utf-8')
+
+
+# ==========================================
+# 2. WORKERS
+# ==========================================
+_app: Any = None
+
+
+def init_worker(threads: int) -> None:
+    """Loads app.py and all models once per worker process."""
+    global _app
+    for key, value in WORKER_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))  # Before torch is imported by the loaders
+    import app
+    if not app.ensure_models_loaded(timeout=None):
+        raise RuntimeError("Models failed to load")
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(threads)
+    _app = app
+
+
+def lime_selected(text: str, rate: float) -> bool:
+    """Deterministic LIME sample by text hash, so a resumed run makes the same choices."""
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16) < rate * 0x100000000
+
+
+def score_chunk(rows: List[Dict[str, Any]], lime_rate: float) -> List[Dict[str, Any]]:
+    texts = [str(row.get('Input_Text') or '').strip() for row in rows]
+    results = _app.score_batch(texts, explain=[lime_selected(t, lime_rate) for t in texts])
+    records = []
+    for row, result in zip(rows, results):
+        record = to_record(row, result)
+        record['result'] = result
+        records.append(record)
+    return records
+
+
+# ==========================================
+# 3. CHECKPOINTS
+# ==========================================
+def checkpoint_path(out_path: str) -> str:
+    return out_path + CHECKPOINT_SUFFIX
+
+
+def load_checkpoint(out_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(checkpoint_path(out_path), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(out_path: str, state: Dict[str, Any]) -> None:
+    """Written atomically (temp file + rename) after the output bytes it covers are on disk."""
+    tmp = f"{checkpoint_path(out_path)}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, checkpoint_path(out_path))
+
+
+# ==========================================
+# 4. RUN
+# ==========================================
+def run(input_path: str, out_path: str, workers: int, chunk_size: int = CHUNK_SIZE,
+        lime_rate: float = 1.0, restart: bool = False) -> Dict[str, Any]:
+    """
+    Streams `input_path` through `score_batch` on a process pool and appends
+    results to `out_path` in input order. After every chunk the output is
+    fsynced and the checkpoint records how many input rows and output bytes
+    are complete, so an interrupted run resumes where it stopped (anything
+    written after the last checkpoint is truncated away).
+    """
+    state = None if restart else load_checkpoint(out_path)
+    if state is None:
+        if os.path.exists(out_path) and not restart:
+            raise SystemExit(f"❌ {out_path} exists without a checkpoint. Use --restart to overwrite it.")
+        state = {'input': os.path.abspath(input_path), 'rows_done': 0, 'out_bytes': 0, 'complete': False}
+    elif state['input'] != os.path.abspath(input_path):
+        raise SystemExit(f"❌ Checkpoint belongs to {state['input']}. Use --restart to score a new input.")
+    if state['complete']:
+        print(f"✅ {out_path} is already complete ({state['rows_done']} rows).")
+        return state
+
+    jsonl = is_jsonl(out_path)
+    rows = islice(read_postings(input_path), state['rows_done'], None)
+    chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+    if state['rows_done']:
+        print(f"↩️  Resuming after {state['rows_done']} rows")
+
+    threads = max(1, (os.cpu_count() or 1) // max(workers, 1))
+    if workers > 0:
+        executor: Any = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=init_worker, initargs=(threads,))
+    else:
+        init_worker(threads)  # In-process, for debugging
+        executor = None
+
+    def submit(chunk: List[Dict[str, Any]]) -> Future:
+        if executor is not None:
+            return executor.submit(score_chunk, chunk, lime_rate)
+        done: Future = Future()
+        done.set_result(score_chunk(chunk, lime_rate))
+        return done
+
+    start = time.perf_counter()
+    scored = 0
+    with open(out_path, 'ab') as out:
+        out.truncate(state['out_bytes'])
+        in_flight: deque = deque()
+        try:
+            while True:
+                # Keep every worker busy, but never read far ahead of what is written
+                while len(in_flight) < max(2 * workers, 1):
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    in_flight.append((len(chunk), submit(chunk)))
+                if not in_flight:
+                    break
+
+                count, future = in_flight.popleft()
+                records = future.result()
+                out.write(encode_records(records, jsonl, header=not jsonl and state['out_bytes'] == 0))
+                out.flush()
+                os.fsync(out.fileno())
+                state['rows_done'] += count
+                state['out_bytes'] = out.tell()
+                save_checkpoint(out_path, state)
+
+                scored += count
+                elapsed = time.perf_counter() - start
+                print(f"📦 {state['rows_done']} rows done ({scored / elapsed:.1f} postings/s)", flush=True)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    state['complete'] = True
+    save_checkpoint(out_path, state)
+    print(f"✅ Scored {scored} postings in {time.perf_counter() - start:.1f}s -> {out_path}")
+    return state
+
+
+# ==========================================
+# 5. ENTRY POINT
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scores a CSV/JSONL file of postings with the full app.py pipeline.")
+    parser.add_argument("input", help="CSV or JSONL in the results.csv layout (Input_Text, optional ID/Type/Expected).")
+    parser.add_argument("output", help="Results file (.csv in the results.csv layout, or .jsonl with the full API result).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, each loading the models once (0 = score in this process).")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    lime = parser.add_mutually_exclusive_group()
+    lime.add_argument("--no-lime", action="store_true", help="Skip the LIME stage entirely.")
+    lime.add_argument("--lime-sample", type=float, default=1.0,
+                      help="Fraction of explainable postings that get LIME insights (by text hash).")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and overwrite the output.")
+    args = parser.parse_args()
+
+    run(args.input, args.output, args.workers, args.chunk_size,
+        lime_rate=0.0 if args.no_lime else args.lime_sample, restart=args.restart)
@@ -0,0 +1,167 @@
+import argparse
+import os
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Only Spacy, Sklearn and the anomaly detector are loaded explicitly below
+os.environ.setdefault("JOBGUARD_LOAD_MODE", "lazy")
+os.environ.setdefault("JOBGUARD_CACHE_BACKEND", "null")
+os.environ.setdefault("JOBGUARD_NEARDUP_LEARN", "0")
+
+import app
+from parity_check import load_posts
+
+# --- CONFIGURATION ---
+SOURCE_MODEL = "en_core_web_lg"
+OUTPUT_DIR = "en_core_web_lg_compact"
+DEFAULT_ROWS = 100000   # Most frequent vectors kept; the rest map to their nearest kept row
+DEFAULT_DTYPE = "float16"
+
+
+# ---------------------
+
+# ==========================================
+# 1. BUILD
+# ==========================================
+def table_mb(nlp: Any) -> float:
+    return nlp.vocab.vectors.data.nbytes / 2**20
+
+
+def build(source: str = SOURCE_MODEL, output: str = OUTPUT_DIR,
+          rows: int = DEFAULT_ROWS, dtype: str = DEFAULT_DTYPE) -> None:
+    """
+    Writes a copy of `source` with at most `rows` unique vectors stored as
+    `dtype`. `Vocab.prune_vectors` keeps the most frequent rows and points every
+    pruned word at its most similar kept vector, so no word loses its vector.
+    """
+    import spacy
+
+    nlp = spacy.load(source, exclude=app.SPACY_SCORING_UNUSED)
+    vectors = nlp.vocab.vectors
+    before = (vectors.shape[0], vectors.n_keys, table_mb(nlp))
+    if rows < vectors.shape[0]:
+        print(f"Pruning {vectors.shape[0]} rows to {rows} (nearest-neighbour remap)...")
+        nlp.vocab.prune_vectors(rows)
+        vectors = nlp.vocab.vectors  # prune_vectors replaces the table
+    vectors.data = np.ascontiguousarray(vectors.data, dtype=dtype)
+    nlp.to_disk(output)
+
+    print(f"Source:  {before[0]:>7} rows, {before[1]:>7} keys, {before[2]:8.1f} MB ({source})")
+    print(f"Compact: {vectors.shape[0]:>7} rows, {vectors.n_keys:>7} keys, {table_mb(nlp):8.1f} MB ({output}, {dtype})")
+    print(f"\nServe it with JOBGUARD_SPACY_MODEL={os.path.abspath(output)} "
+          f"(optionally JOBGUARD_SPACY_MMAP_VECTORS=1), then run `python compact_vectors.py report`.")
+
+
+# ==========================================
+# 2. REPORT
+# ==========================================
+def load_vectors(model: str) -> Tuple[Any, float]:
+    """Loads a Spacy model exactly as the app does (vectors-only, mmap, float32 doc vectors)."""
+    app.SPACY_MODEL = model
+    start = time.perf_counter()
+    state = app.load_spacy()
+    seconds = time.perf_counter() - start
+    if state != "ready":
+        raise SystemExit(f"Could not load Spacy model '{model}'")
+    return app.nlp_engine, seconds
+
+
+def completed(result: Any) -> Future:
+    future: Future = Future()
+    future.set_result(result)
+    return future
+
+
+def score(posts: List[str], docs: List[Any]) -> Dict[str, Any]:
+    """Doc vectors, Sklearn probabilities and anomaly alerts computed from one set of docs."""
+    return {
+        'vectors': np.array([doc.vector for doc in docs], dtype=np.float32),
+        'sklearn': app.sklearn_predict_proba(posts, docs),
+        'anomaly': app.anomaly_explain_batch(app.anomaly_features(posts, docs)),
+    }
+
+
+def cosines(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.divide((a * b).sum(axis=1), norms, out=np.ones(len(a)), where=norms > 0)
+
+
+def report(original: str, compact: str, posts: List[str]) -> None:
+    """
+    Scores `posts` with the original and the compact vector table and
+    reports doc-vector drift plus how many Sklearn, anomaly and final
+    verdicts change (BERT is computed once and shared by both sides).
+    """
+    app.load_anomaly()
+    app.load_bert()
+
+    runs: Dict[str, Dict[str, Any]] = {}
+    for name, model in (("original", original), ("compact", compact)):
+        nlp, load_seconds = load_vectors(model)
+        if app.sklearn_pipeline is None:
+            app.load_sklearn(completed(nlp))
+        elif app.sklearn_pipeline:
+            app.force_inject_spacy(app.sklearn_pipeline, nlp)
+        start = time.perf_counter()
+        docs = app.spacy_docs(posts, n_process=1)
+        runs[name] = {**score(posts, docs), 'load': load_seconds, 'parse': time.perf_counter() - start,
+                      'mb': table_mb(nlp), 'mapped': isinstance(nlp.vocab.vectors.data, np.memmap),
+                      'rows': nlp.vocab.vectors.shape[0]}
+
+    bert = app.bert_predict_proba(posts, app.BATCH_MAX_SIZE)
+    for run in runs.values():
+        flagged = [bool(alerts) for alerts in run['anomaly']]
+        run['verdicts'] = app.scoring_policy.verdicts(app.scoring_policy.fuse(bert, run['sklearn'], flagged))
+
+    ref, new = runs['original'], runs['compact']
+    print(f"\n{'Table':<9} | {'Rows':>7} | {'Size MB':>8} | {'Mapped':>6} | {'Load s':>7} | {'Parse s':>7}")
+    print("-" * 58)
+    for name, run in runs.items():
+        print(f"{name:<9} | {run['rows']:>7} | {run['mb']:>8.1f} | {str(run['mapped']):>6} | "
+              f"{run['load']:>7.2f} | {run['parse']:>7.2f}")
+
+    cos = cosines(ref['vectors'], new['vectors'])
+    sk_delta = np.abs(ref['sklearn'] - new['sklearn'])
+    sk_flips = int(np.sum((ref['sklearn'] > 0.5) != (new['sklearn'] > 0.5)))
+    an_flips = sum(bool(a) != bool(b) for a, b in zip(ref['anomaly'], new['anomaly']))
+    verdict_flips = int(np.sum(ref['verdicts'] != new['verdicts']))
+    n = len(posts)
+
+    print(f"\nDoc-vector cosine vs original ({n} posts): mean {cos.mean():.5f}, "
+          f"p5 {np.percentile(cos, 5):.5f}, min {cos.min():.5f}")
+    if app.sklearn_pipeline:
+        print(f"Sklearn:  max |Δp| {sk_delta.max():.4f}, mean |Δp| {sk_delta.mean():.4f}, "
+              f"label flips {sk_flips}/{n}")
+    else:
+        print("Sklearn:  pipeline not available, skipped")
+    if app.anomaly_model:
+        print(f"Anomaly:  alert flips {an_flips}/{n}")
+    else:
+        print("Anomaly:  detector not available, skipped")
+    print(f"Ensemble: verdict flips {verdict_flips}/{n} ({100 * (1 - verdict_flips / max(n, 1)):.2f}% agreement)")
+
+
+# ==========================================
+# 3. ENTRY POINT
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds and checks a pruned, float16 Spacy vector table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="Write a compact copy of the Spacy model.")
+    build_cmd.add_argument("--source", default=SOURCE_MODEL)
+    build_cmd.add_argument("--output", default=OUTPUT_DIR)
+    build_cmd.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Unique vectors to keep.")
+    build_cmd.add_argument("--dtype", choices=["float16", "float32"], default=DEFAULT_DTYPE)
+    report_cmd = sub.add_parser("report", help="Compare the compact table against the original over results.csv.")
+    report_cmd.add_argument("--original", default=SOURCE_MODEL)
+    report_cmd.add_argument("--compact", default=OUTPUT_DIR)
+    report_cmd.add_argument("--limit", type=int, default=0, help="Only use the first N posts.")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.source, args.output, args.rows, args.dtype)
+    else:
+        report(args.original, args.compact, load_posts(limit=args.limit))
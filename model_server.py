@@ -0,0 +1,308 @@
+import argparse
+import itertools
+import os
+import pickle
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# --- CONFIGURATION ---
+SOCKET_PATH = os.environ.get("JOBGUARD_MODEL_SERVER_SOCKET", "/tmp/jobguard-models.sock")
+MAX_BATCH_REQUESTS = int(os.environ.get("JOBGUARD_MODEL_SERVER_BATCH", "16"))     # Client requests per batch
+MAX_WAIT_MS = float(os.environ.get("JOBGUARD_MODEL_SERVER_WAIT_MS", "5"))
+CONNECT_TIMEOUT = 5.0
+CALL_TIMEOUT = float(os.environ.get("JOBGUARD_MODEL_SERVER_TIMEOUT", "60"))  # Default deadline of one call
+# Stages the server runs. Each request carries a list of postings; "sklearn_lime"
+# scores LIME perturbations of one posting (PerturbationVectorizer path).
+OPS = ("bert", "sklearn", "sklearn_lime", "anomaly")
+
+
+# ---------------------
+
+# ==========================================
+# 1. WIRE FORMAT
+# ==========================================
+# Length-prefixed pickle frames. Both ends are local processes of this app and the
+# socket is created owner-only (0600), so frames are trusted like the model pickles.
+_HEADER = struct.Struct("!I")
+
+
+def send_frame(sock: socket.socket, obj: Any) -> None:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Any]:
+    """The next frame, or None once the peer has closed the connection."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    data = _recv_exact(sock, _HEADER.unpack(header)[0])
+    return None if data is None else pickle.loads(data)
+
+
+# ==========================================
+# 2. CLIENT (WEB WORKERS)
+# ==========================================
+class ModelServerClient:
+    """
+    One multiplexed connection per web worker process. Request threads
+    `submit` concurrently; a reader thread resolves their Futures as the
+    server answers, so a slow BERT batch never blocks a Sklearn reply.
+    """
+    def __init__(self, path: str = SOCKET_PATH):
+        self.path = path
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._pid: Optional[int] = None
+
+    def _connect(self) -> socket.socket:
+        # Reconnects after a fork (gunicorn --preload) or a dropped connection
+        if self._sock is not None and self._pid == os.getpid():
+            return self._sock
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(self.path)
+        sock.settimeout(None)
+        self._sock, self._pid = sock, os.getpid()
+        self._pending = {}
+        threading.Thread(target=self._read, args=(sock,), name="model-server-reader", daemon=True).start()
+        return sock
+
+    def _read(self, sock: socket.socket) -> None:
+        error: Exception = ConnectionError("Model server closed the connection")
+        try:
+            while True:
+                frame = recv_frame(sock)
+                if frame is None:
+                    break
+                request_id, ok, result = frame
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(f"Model server: {result}"))
+        except OSError as e:
+            error = e
+        with self._lock:
+            orphans = self._drop(sock)
+        for future in orphans:
+            future.set_exception(error)
+
+    def _drop(self, sock: socket.socket) -> List[Future]:
+        """Forgets a dead connection (call with the lock held). Returns the futures still waiting on it."""
+        if self._sock is not sock:
+            return []  # Already dropped; its futures were failed then
+        self._sock = None
+        orphans, self._pending = list(self._pending.values()), {}
+        try:
+            sock.close()  # Also wakes its reader thread
+        except OSError:
+            pass
+        return [future for future in orphans if not future.done()]
+
+    def submit(self, op: str, payload: Any = None) -> Future:
+        future: Future = Future()
+        orphans: List[Future] = []
+        error: Optional[OSError] = None
+        with self._lock:
+            sock = None
+            try:
+                sock = self._connect()
+                request_id = next(self._ids)
+                self._pending[request_id] = future
+                send_frame(sock, (request_id, op, payload))
+            except OSError as e:
+                error = e
+                # The connection is broken for every request on it, not just this one
+                orphans = self._drop(sock) if sock is not None else []
+        if error is not None:
+            for pending in orphans:
+                pending.set_exception(error)
+            if not future.done():
+                future.set_exception(error)
+        return future
+
+    def call(self, op: str, payload: Any = None, timeout: Optional[float] = CALL_TIMEOUT) -> Any:
+        return self.submit(op, payload).result(timeout)
+
+    def stats(self, timeout: float = 1.0) -> Dict[str, Any]:
+        """Server queue depth and per-stage batch counters."""
+        return self.call("stats", timeout=timeout)
+
+    def wait_ready(self, timeout: Optional[float]) -> bool:
+        """Polls until the server answers (it only listens once its models are loaded)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                self.stats()
+                return True
+            except Exception:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.5)
+
+
+# ==========================================
+# 3. SERVER (OWNS THE MODELS)
+# ==========================================
+class ModelServer:
+    """
+    Loads every model once (through app.py) and serves scoring requests from
+    all web workers on a Unix socket. Requests for the same stage are gathered
+    across connections by a MicroBatcher, so N workers share one forward pass.
+    """
+    def __init__(self, jobguard: Any, path: str = SOCKET_PATH,
+                 max_batch: int = MAX_BATCH_REQUESTS, max_wait_ms: float = MAX_WAIT_MS):
+        self.app = jobguard
+        self.path = path
+        stage_fns: Dict[str, Callable[[List[str]], Any]] = {
+            "bert": lambda texts: jobguard.bert_predict_proba(texts, jobguard.BATCH_MAX_SIZE),
+            "sklearn": lambda texts: jobguard.sklearn_predict_proba(texts, jobguard.spacy_docs(texts)),
+            "sklearn_lime": lambda texts: jobguard.sklearn_predict_proba(texts, perturbations=True),
+            "anomaly": lambda texts: jobguard.anomaly_predict(texts),
+        }
+        self.batchers = {
+            op: jobguard.MicroBatcher(f"server-{op}", self._batched(op, fn), max_batch, max_wait_ms)
+            for op, fn in stage_fns.items()
+        }
+        self.counters = {op: {'requests': 0, 'texts': 0, 'batches': 0} for op in OPS}
+        self.in_flight = 0
+        self.clients = 0
+        self._lock = threading.Lock()
+
+    def _batched(self, op: str, fn: Callable[[List[str]], Any]) -> Callable[[List[List[str]]], List[Any]]:
+        """Runs the postings of many requests as one batch and splits the results back up."""
+        def run(requests: List[List[str]]) -> List[Any]:
+            flat = [text for texts in requests for text in texts]
+            results = list(fn(flat)) if flat else []
+            with self._lock:
+                self.counters[op]['batches'] += 1
+            out, start = [], 0
+            for texts in requests:
+                out.append(results[start:start + len(texts)])
+                start += len(texts)
+            return out
+        return run
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {op: {**c, 'queued': self.batchers[op].pending()} for op, c in self.counters.items()}
+            return {'queue_depth': self.in_flight, 'clients': self.clients, 'stages': stages}
+
+    def _reply(self, sock: socket.socket, send_lock: threading.Lock, request_id: int, ok: bool, result: Any) -> None:
+        try:
+            with send_lock:
+                send_frame(sock, (request_id, ok, result))
+        except OSError:
+            pass  # Client went away; its reader fails the pending futures
+
+    def _finish(self, sock: socket.socket, send_lock: threading.Lock, request_id: int, future: Future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        error = future.exception()
+        if error is not None:
+            self._reply(sock, send_lock, request_id, False, str(error))
+        else:
+            self._reply(sock, send_lock, request_id, True, future.result())
+
+    def handle(self, sock: socket.socket) -> None:
+        """Serves one web worker connection until it closes."""
+        send_lock = threading.Lock()
+        with self._lock:
+            self.clients += 1
+        try:
+            while True:
+                frame = recv_frame(sock)
+                if frame is None:
+                    return
+                request_id, op, payload = frame
+                if op == "stats":
+                    self._reply(sock, send_lock, request_id, True, self.stats())
+                    continue
+                if op not in self.batchers:
+                    self._reply(sock, send_lock, request_id, False, f"Unknown stage '{op}'")
+                    continue
+                texts = [str(t) for t in payload]
+                with self._lock:
+                    self.in_flight += 1
+                    self.counters[op]['requests'] += 1
+                    self.counters[op]['texts'] += len(texts)
+                future = self.batchers[op].submit(texts)
+                future.add_done_callback(lambda f, rid=request_id: self._finish(sock, send_lock, rid, f))
+        except OSError:
+            return
+        finally:
+            with self._lock:
+                self.clients -= 1
+            sock.close()
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Stale socket from a previous run
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # Owner-only socket
+        try:
+            listener.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(128)
+        self.app.log_debug(f"🛰️ Model Server listening on {self.path}", "STARTUP")
+        try:
+            while True:
+                conn, _ = listener.accept()
+                threading.Thread(target=self.handle, args=(conn,), name="model-server-conn", daemon=True).start()
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def serve(path: str = SOCKET_PATH) -> None:
+    """Loads the models in this process (never as a client of itself) and serves them."""
+    os.environ.pop("JOBGUARD_MODEL_SERVER", None)
+    os.environ["JOBGUARD_LOAD_MODE"] = "blocking"
+    import app as jobguard
+    ModelServer(jobguard, path).serve_forever()
+
+
+# ==========================================
+# 4. ENTRY POINT
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves the JobGuard models to web workers over a Unix socket.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="Load the models and listen for web workers.")
+    serve_cmd.add_argument("--socket", default=SOCKET_PATH)
+    stats_cmd = sub.add_parser("stats", help="Print the running server's queue depth and batch counters.")
+    stats_cmd.add_argument("--socket", default=SOCKET_PATH)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket)
+    else:
+        stats = ModelServerClient(args.socket).stats(timeout=CONNECT_TIMEOUT)
+        print(f"Queue depth: {stats['queue_depth']} in flight, {stats['clients']} clients")
+        print(f"{'Stage':<13} | {'Queued':>6} | {'Requests':>8} | {'Texts':>8} | {'Batches':>7} | {'Req/batch':>9}")
+        print("-" * 66)
+        for op, s in stats['stages'].items():
+            per_batch = s['requests'] / s['batches'] if s['batches'] else 0.0
+            print(f"{op:<13} | {s['queued']:>6} | {s['requests']:>8} | {s['texts']:>8} | {s['batches']:>7} | {per_batch:>9.2f}")
@@ -0,0 +1,230 @@
+import argparse
+import csv
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# --- CONFIGURATION ---
+INDEX_FILE_PATH = 'near_duplicate_index.npz'
+RESULTS_CSV_PATH = 'results.csv'
+NUM_PERM = 128     # MinHash signature length
+BANDS = 16         # LSH bands (NUM_PERM / BANDS rows each): candidates from ~0.7 Jaccard up
+SHINGLE_SIZE = 3   # Word n-grams
+SEED = 1
+
+
+# ---------------------
+
+# ==========================================
+# 1. MINHASH SIGNATURES
+# ==========================================
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """
+    Word n-grams of the normalized text. Numbers collapse to '0', so reposts
+    that only change a phone number, fee or date still share their shingles.
+    """
+    tokens = re.sub(r'\d+', '0', text.lower())
+    tokens = re.findall(r'[a-z0-9]+', tokens)
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return list({" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)})
+
+
+class NearDuplicateIndex:
+    """
+    MinHash + banded LSH index over previously scored postings.
+
+    Each posting is reduced to a `num_perm` MinHash signature of its word
+    shingles (multiply-shift hashing over CRC32 shingle ids, vectorized in
+    NumPy). Signatures are split into `bands`; postings sharing any band are
+    candidates, and the candidate with the most equal signature slots (the
+    Jaccard estimate) is the nearest prior verdict.
+
+    With `max_entries` set the index is a ring: once full, each new posting
+    replaces the oldest one (FIFO), so memory and save files stay bounded.
+    """
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, shingle_size: int = SHINGLE_SIZE, seed: int = SEED,
+                 max_entries: int = 0):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.max_entries = max_entries  # 0 = unbounded
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.verdicts: List[str] = []
+        self.probabilities: List[float] = []
+        self._count = 0   # Postings currently indexed
+        self._oldest = 0  # Slot replaced next once the ring is full
+        self.added = 0    # Postings ever added
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature (uint32, `num_perm`) of a text, or None if it has no words."""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        ids = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+        # h(x) = (a*x + b) mod 2^64 >> 32, one hash function per column
+        hashed = (ids[:, None] * self._a + self._b) >> np.uint64(32)
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _add_signature(self, signature: np.ndarray, verdict: str, fraud_probability: float) -> int:
+        with self._lock:
+            self.added += 1
+            if self.max_entries and self._count >= self.max_entries:
+                idx = self._oldest
+                self._oldest = (idx + 1) % self._count
+                for band, key in zip(self._buckets, self._band_keys(self.signatures[idx])):
+                    slots = band[key]
+                    slots.remove(idx)
+                    if not slots:
+                        del band[key]
+                self.signatures[idx] = signature
+                self.verdicts[idx] = verdict
+                self.probabilities[idx] = float(fraud_probability)
+            else:
+                idx = self._count
+                if idx == len(self.signatures):
+                    size = max(2 * idx, 64)
+                    grown = np.empty((min(size, self.max_entries) if self.max_entries else size, self.num_perm), dtype=np.uint32)
+                    grown[:idx] = self.signatures[:idx]
+                    self.signatures = grown
+                self.signatures[idx] = signature
+                self.verdicts.append(verdict)
+                self.probabilities.append(float(fraud_probability))
+                self._count += 1
+            for band, key in zip(self._buckets, self._band_keys(signature)):
+                band.setdefault(key, []).append(idx)
+            return idx
+
+    def add(self, text: str, verdict: str, fraud_probability: float) -> Optional[int]:
+        """Indexes a scored posting. Returns its id (None for texts without words)."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        return self._add_signature(signature, verdict, fraud_probability)
+
+    def query(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Nearest previously indexed posting that shares an LSH band with the text.
+
+        Returns:
+            Optional[Dict[str, Any]]: {'id', 'similarity', 'verdict', 'fraud_probability'},
+            or None when there is no candidate.
+        """
+        signature = self.signature(text)
+        if signature is None or not self._count:
+            return None
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        if not candidates:
+            return None
+
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self.signatures[ids] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        idx = int(ids[best])
+        return {
+            'id': idx,
+            'similarity': round(float(similarity[best]), 4),
+            'verdict': self.verdicts[idx],
+            'fraud_probability': self.probabilities[idx],
+        }
+
+    # ==========================================
+    # 2. PERSISTENCE
+    # ==========================================
+    def save(self, path: str = INDEX_FILE_PATH) -> None:
+        """Writes the index atomically (temp file + rename), so readers never see a partial file."""
+        with self._lock:
+            # Oldest first, so a reloaded ring evicts in the same order
+            order = np.roll(np.arange(self._count), -self._oldest)
+            tmp = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(
+                tmp,
+                signatures=self.signatures[order],
+                verdicts=np.array(self.verdicts, dtype=str)[order],
+                probabilities=np.array(self.probabilities, dtype=np.float64)[order],
+                params=np.array([self.num_perm, self.bands, self.shingle_size, self.seed], dtype=np.int64),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE_PATH, max_entries: int = 0) -> 'NearDuplicateIndex':
+        """Reads a saved index (only the newest `max_entries` postings if bounded)."""
+        with np.load(path) as data:
+            num_perm, bands, shingle_size, seed = (int(v) for v in data['params'])
+            index = cls(num_perm, bands, shingle_size, seed, max_entries)
+            start = max(len(data['verdicts']) - max_entries, 0) if max_entries else 0
+            for signature, verdict, prob in zip(data['signatures'][start:], data['verdicts'][start:],
+                                                data['probabilities'][start:]):
+                index._add_signature(signature, str(verdict), float(prob))
+        return index
+
+
+# ==========================================
+# 3. BULK BUILD FROM results.csv
+# ==========================================
+def build_from_results(path: str = RESULTS_CSV_PATH, label_column: str = 'Predicted', **params: Any) -> NearDuplicateIndex:
+    """
+    Indexes every posting of a results.csv-style file. Labels are REAL/FAKE
+    (mapped to the API verdicts) and `Confidence` is the fraud probability (0-1).
+    """
+    index = NearDuplicateIndex(**params)
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            text = row.get('Input_Text')
+            if not text:
+                continue
+            verdict = "Fake" if row.get(label_column, '').upper() == "FAKE" else "Real"
+            index.add(text, verdict, round(float(row.get('Confidence') or 0) * 100, 2))
+    return index
+
+
+# ==========================================
+# 4. ENTRY POINT
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds or queries the near-duplicate posting index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Index a results.csv-style file.")
+    build.add_argument("--csv", default=RESULTS_CSV_PATH)
+    build.add_argument("--out", default=INDEX_FILE_PATH)
+    build.add_argument("--label-column", default="Predicted", help="'Predicted' (model verdicts) or 'Expected' (ground truth).")
+    build.add_argument("--bands", type=int, default=BANDS)
+    build.add_argument("--num-perm", type=int, default=NUM_PERM)
+    query = sub.add_parser("query", help="Look up the nearest indexed posting.")
+    query.add_argument("text")
+    query.add_argument("--index", default=INDEX_FILE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        idx = build_from_results(args.csv, args.label_column, num_perm=args.num_perm, bands=args.bands)
+        idx.save(args.out)
+        print(f"✅ Indexed {len(idx)} postings in {time.perf_counter() - start:.2f}s -> {args.out}")
+    else:
+        idx = NearDuplicateIndex.load(args.index)
+        start = time.perf_counter()
+        match = idx.query(args.text)
+        print(f"{match} ({(time.perf_counter() - start) * 1000:.3f} ms)")
@@ -0,0 +1,264 @@
+import argparse
+import csv
+import time
+from typing import Any, List, Tuple
+
+import numpy as np
+
+import app
+
+# --- CONFIGURATION ---
+RESULTS_CSV_PATH = 'results.csv'
+AE_TOLERANCE = 1e-4
+BERT_MIN_AGREEMENT = 0.99
+CASCADE_MIN_AGREEMENT = 0.98
+# (low, high) Sklearn bands the cascade replay sweeps besides the configured one
+CASCADE_BANDS = [(0.05, 0.95), (0.10, 0.90), (0.20, 0.85), (0.30, 0.80)]
+
+
+# ---------------------
+
+# ==========================================
+# 1. DATA
+# ==========================================
+def load_posts(path: str = RESULTS_CSV_PATH, limit: int = 0) -> List[str]:
+    """Reads the `Input_Text` column of results.csv."""
+    with open(path, newline='', encoding='utf-8') as f:
+        posts = [row['Input_Text'] for row in csv.DictReader(f) if row.get('Input_Text')]
+    return posts[:limit] if limit else posts
+
+
+def load_labels(path: str = RESULTS_CSV_PATH, limit: int = 0) -> List[str]:
+    """Reads the `Expected` column (REAL/FAKE) for the same rows as `load_posts`."""
+    with open(path, newline='', encoding='utf-8') as f:
+        labels = [row.get('Expected', '').upper() for row in csv.DictReader(f) if row.get('Input_Text')]
+    return labels[:limit] if limit else labels
+
+
+# ==========================================
+# 2. AUTOENCODER: NUMPY vs KERAS
+# ==========================================
+def check_autoencoder(posts: List[str], atol: float = AE_TOLERANCE) -> bool:
+    """
+    Reconstructs the anomaly features of every post with the NumPy forward pass
+    and with the original Keras model, and reports the largest difference.
+    """
+    detector = app.anomaly_model
+    if detector is None:
+        print("❌ Anomaly model not loaded.")
+        return False
+
+    docs = app.spacy_docs(posts)
+    input_scaled = detector.scaler.transform(app.anomaly_features(posts, docs))
+
+    start = time.perf_counter()
+    detector.reconstruct(input_scaled)
+    numpy_ms = (time.perf_counter() - start) * 1000
+
+    ok, max_diff = detector.check_backend_parity(input_scaled, atol=atol)
+
+    print("\n" + "=" * 60)
+    print("AUTOENCODER PARITY (NumPy vs Keras)")
+    print("=" * 60)
+    print(f"Rows:            {len(posts)}")
+    print(f"Max |diff|:      {max_diff:.2e} (tolerance {atol:.0e})")
+    print(f"NumPy batch:     {numpy_ms:.2f} ms")
+    print(f"Result:          {'✅ PASS' if ok else '❌ FAIL'}")
+    return ok
+
+
+# ==========================================
+# 3. STRUCTURAL FEATURES: BATCH vs SCALAR
+# ==========================================
+def check_structural_features(posts: List[str]) -> bool:
+    """Compares the vectorized structural extractor with the per-text reference (must be bit-identical)."""
+    start = time.perf_counter()
+    reference = np.array([app.extract_structural_features(post) for post in posts])
+    scalar_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    batch = app.extract_structural_features_batch(posts, dtype=np.float64)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    ok = np.array_equal(reference, batch)
+    print("\n" + "=" * 60)
+    print("STRUCTURAL FEATURES PARITY (batch vs scalar)")
+    print("=" * 60)
+    print(f"Rows:            {len(posts)}")
+    print(f"Mismatched rows: {int(np.sum(np.any(reference != batch, axis=1)))}")
+    print(f"Scalar / batch:  {scalar_ms:.2f} ms / {batch_ms:.2f} ms")
+    print(f"Result:          {'✅ PASS' if ok else '❌ FAIL'}")
+    return ok
+
+
+# ==========================================
+# 4. SPACY: VECTORS-ONLY vs FULL PIPELINE
+# ==========================================
+def check_spacy_vectors(posts: List[str], n_process: int = 2) -> bool:
+    """
+    Compares doc vectors of the full `en_core_web_lg` pipeline with the
+    vectors-only pipeline, both batched and multi-process (must be identical).
+    """
+    import spacy
+    full = spacy.load(app.SPACY_MODEL)
+    start = time.perf_counter()
+    reference = np.array([doc.vector for doc in full.pipe(posts)])
+    full_ms = (time.perf_counter() - start) * 1000
+
+    lean = spacy.load(app.SPACY_MODEL, exclude=app.SPACY_SCORING_UNUSED)
+    lean.select_pipes(disable=lean.pipe_names)
+    start = time.perf_counter()
+    batched = np.array([doc.vector for doc in lean.pipe(posts, batch_size=app.SPACY_BATCH_SIZE)])
+    lean_ms = (time.perf_counter() - start) * 1000
+    multi = np.array([doc.vector for doc in lean.pipe(posts, batch_size=app.SPACY_BATCH_SIZE, n_process=n_process)])
+
+    ok = np.array_equal(reference, batched) and np.array_equal(reference, multi)
+    print("\n" + "=" * 60)
+    print("SPACY VECTORS PARITY (vectors-only vs full pipeline)")
+    print("=" * 60)
+    print(f"Rows:            {len(posts)}")
+    print(f"Components:      {', '.join(full.pipe_names) or '-'} -> {', '.join(lean.pipe_names) or '-'}")
+    print(f"Max |diff|:      {float(np.max(np.abs(reference - batched), initial=0.0)):.2e} (batched), "
+          f"{float(np.max(np.abs(reference - multi), initial=0.0)):.2e} (n_process={n_process})")
+    print(f"Full / lean:     {full_ms:.2f} ms / {lean_ms:.2f} ms")
+    print(f"Result:          {'✅ PASS' if ok else '❌ FAIL'}")
+    return ok
+
+
+# ==========================================
+# 5. BERT: BACKENDS vs FLOAT32 BASELINE
+# ==========================================
+def score_with_backend(posts: List[str], backend: Any) -> Tuple[np.ndarray, float]:
+    """Scores posts one at a time (like /predict) and returns (probs, mean ms per post)."""
+    start = time.perf_counter()
+    probs = np.array([app.bert_predict_proba([post], backend=backend)[0] for post in posts])
+    return probs, (time.perf_counter() - start) * 1000 / max(len(posts), 1)
+
+
+def check_bert_backends(posts: List[str], names: List[str], min_agreement: float = BERT_MIN_AGREEMENT) -> bool:
+    """
+    Re-scores the posts with each BERT backend and reports verdict agreement,
+    probability drift and latency against the float32 PyTorch baseline.
+    """
+    if not app.bert_model:
+        print("❌ BERT model not loaded.")
+        return False
+
+    baseline_probs, baseline_ms = score_with_backend(posts, app.TorchBertBackend(app.bert_model))
+    baseline_verdicts = baseline_probs > 0.5
+
+    print("\n" + "=" * 60)
+    print("BERT BACKEND PARITY (vs float32 PyTorch)")
+    print("=" * 60)
+    print(f"{'Backend':<12} | {'Agreement':>9} | {'Max |dP|':>8} | {'ms/post':>8} | {'Speedup':>7}")
+    print("-" * 60)
+    print(f"{'torch':<12} | {100.0:>8.2f}% | {0.0:>8.4f} | {baseline_ms:>8.2f} | {1.0:>6.2f}x")
+
+    passed = True
+    for name in names:
+        backend = app.load_bert_backend(name)
+        if backend.name != name:
+            print(f"{name:<12} | unavailable (fell back to {backend.name})")
+            passed = False
+            continue
+        probs, ms = score_with_backend(posts, backend)
+        agreement = float(np.mean((probs > 0.5) == baseline_verdicts))
+        max_drift = float(np.max(np.abs(probs - baseline_probs)))
+        print(f"{name:<12} | {agreement * 100:>8.2f}% | {max_drift:>8.4f} | {ms:>8.2f} | {baseline_ms / ms:>6.2f}x")
+        passed = passed and agreement >= min_agreement
+
+    print(f"Result:          {'✅ PASS' if passed else '❌ FAIL'} (min agreement {min_agreement * 100:.1f}%)")
+    return passed
+
+
+# ==========================================
+# 6. CASCADE: CHEAP-FIRST vs FULL ENSEMBLE
+# ==========================================
+def check_cascade(posts: List[str], labels: List[str], min_agreement: float = CASCADE_MIN_AGREEMENT) -> bool:
+    """
+    Replays the posts through the ensemble decision twice: with every model
+    (the full ensemble) and with the cascade, where BERT only scores the posts
+    `cascade_needs_bert` sends to it. Each model runs once; the fusion is
+    replayed per band. Reports accuracy against `Expected`, verdict agreement
+    with the full ensemble and the fraction of BERT calls saved.
+    """
+    if not app.bert_model or app.sklearn_pipeline is None:
+        print("❌ The cascade needs both BERT and the Sklearn pipeline.")
+        return False
+
+    quiet = lambda *args: None  # noqa: E731 (trace sink)
+    docs = app.spacy_docs(posts)
+    sklearn_scores = app.sklearn_predict_proba(posts, docs)
+    start = time.perf_counter()
+    bert_scores = app.bert_predict_proba(posts)
+    bert_ms = (time.perf_counter() - start) * 1000 / max(len(posts), 1)
+    alerts = [app.filter_anomaly_alerts(a, quiet) for a in app.anomaly_explain_batch(app.anomaly_features(posts, docs))]
+    flags = [len(app.heuristic_analysis(post)) for post in posts]
+
+    truth = np.array([label == "FAKE" for label in labels])
+    labelled = np.array([label in ("REAL", "FAKE") for label in labels])
+    flagged = np.array([bool(a) for a in alerts])
+    full = app.scoring_policy.fuse(bert_scores, sklearn_scores, flagged)
+    full_verdicts = app.scoring_policy.verdicts(full)
+    # Explainable verdicts also run LIME, whose perturbations go through BERT
+    # unless the cascade decided without it
+    lime_texts = app.LIME_NUM_SAMPLES
+    full_bert_texts = len(posts) + int(np.sum(full_verdicts != "Real")) * lime_texts
+
+    def accuracy(probs: np.ndarray) -> float:
+        return float(np.mean((probs > 0.5)[labelled] == truth[labelled])) if labelled.any() else float('nan')
+
+    print("\n" + "=" * 60)
+    print("CASCADE REPLAY (cheap-first vs full ensemble)")
+    print("=" * 60)
+    print(f"Rows:            {len(posts)} ({int(labelled.sum())} labelled), BERT {bert_ms:.2f} ms/post")
+    print(f"Full ensemble:   accuracy {accuracy(full) * 100:.2f}%")
+    print(f"{'Band':<12} | {'Accuracy':>8} | {'Agreement':>9} | {'BERT saved':>10} | {'+ LIME':>8}")
+    print("-" * 60)
+
+    configured = (app.CASCADE_LOW, app.CASCADE_HIGH)
+    passed = True
+    for low, high in [configured] + [band for band in CASCADE_BANDS if band != configured]:
+        needs = np.array([app.cascade_needs_bert(float(s), f, a, low, high)
+                          for s, f, a in zip(sklearn_scores, flags, alerts)], dtype=bool)
+        cascade = app.scoring_policy.fuse(np.where(needs, bert_scores, sklearn_scores), sklearn_scores, flagged)
+        cascade_verdicts = app.scoring_policy.verdicts(cascade)
+        agreement = float(np.mean(cascade_verdicts == full_verdicts))
+        saved = 1.0 - float(needs.mean()) if len(needs) else 0.0
+        bert_texts = int(needs.sum()) + int(np.sum((cascade_verdicts != "Real") & needs)) * lime_texts
+        saved_with_lime = 1.0 - bert_texts / full_bert_texts if full_bert_texts else 0.0
+        marker = " *" if (low, high) == configured else ""
+        print(f"{low:.2f}-{high:.2f}{marker:<3} | {accuracy(cascade) * 100:>7.2f}% | {agreement * 100:>8.2f}% | "
+              f"{saved * 100:>9.1f}% | {saved_with_lime * 100:>7.1f}%")
+        if (low, high) == configured:
+            passed = agreement >= min_agreement
+
+    print(f"Result:          {'✅ PASS' if passed else '❌ FAIL'} (* configured band, min agreement {min_agreement * 100:.1f}%)")
+    return passed
+
+
+# ==========================================
+# 7. ENTRY POINT
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks optimized inference paths against the reference models.")
+    parser.add_argument("--limit", type=int, default=500, help="Number of results.csv posts to use (0 = all).")
+    parser.add_argument("--check", choices=["all", "autoencoder", "structural", "spacy", "bert", "cascade"], default="all")
+    parser.add_argument("--backends", nargs="+", default=["int8", "onnx", "onnx-int8"],
+                        help="BERT backends to compare against float32 PyTorch.")
+    args = parser.parse_args()
+
+    app.ensure_models_loaded(timeout=None)
+    sample = load_posts(limit=args.limit)
+    passed = True
+    if args.check in ("all", "autoencoder"):
+        passed = check_autoencoder(sample) and passed
+    if args.check in ("all", "structural"):
+        passed = check_structural_features(sample) and passed
+    if args.check in ("all", "spacy"):
+        passed = check_spacy_vectors(sample) and passed
+    if args.check in ("all", "bert"):
+        passed = check_bert_backends(sample, args.backends) and passed
+    if args.check in ("all", "cascade"):
+        passed = check_cascade(sample, load_labels(limit=args.limit)) and passed
+    raise SystemExit(0 if passed else 1)
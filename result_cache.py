@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import Flask
+from flask_caching.backends.base import BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """
+    Flask-Caching backend backed by one SQLite file in WAL mode, so every
+    gunicorn worker on the host (and every restart) shares the same entries.
+
+    - Values are stored as JSON (the cached objects are API responses).
+    - Entries expire after their timeout (TTL) and the table is trimmed back
+      to `max_entries` by least-recent access (LRU).
+    - Access times are only re-written every `touch_interval` seconds, so
+      cache hits stay read-only most of the time.
+
+    Use it through Flask-Caching with `CACHE_TYPE = "result_cache.SQLiteCache"`,
+    `CACHE_SQLITE_PATH` and `CACHE_THRESHOLD` (max entries).
+    """
+    def __init__(self, path: str = "result_cache.db", default_timeout: int = 300,
+                 max_entries: int = 10000, touch_interval: float = 60.0,
+                 ignore_delete_many_errors: bool = False):
+        super().__init__(default_timeout=default_timeout, ignore_delete_many_errors=ignore_delete_many_errors)
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    @classmethod
+    def factory(cls, app: Flask, config: Dict[str, Any], args: List[Any], kwargs: Dict[str, Any]) -> "SQLiteCache":
+        kwargs.update(dict(path=config.get("CACHE_SQLITE_PATH", "result_cache.db"), max_entries=config["CACHE_THRESHOLD"]))
+        return cls(*args, **kwargs)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, re-opened after a fork (gunicorn --preload)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expiry(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else float('inf')
+
+    # Like the other cache backends, a busy or broken store degrades to a miss
+    # instead of failing the request.
+    def get(self, key: str) -> Any:
+        now = time.time()
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires, accessed = row
+            if expires <= now:
+                self.delete(key)
+                return None
+            if now - accessed > self.touch_interval:
+                self._connection().execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), self._expiry(timeout), time.time())
+            )
+            self._maybe_evict()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key: str) -> bool:
+        return self._connection().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def has(self, key: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self) -> bool:
+        self._connection().execute("DELETE FROM cache")
+        return True
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _maybe_evict(self) -> None:
+        """Every ~5% of `max_entries` writes, drops expired rows and then the least recently used overflow."""
+        with self._writes_lock:
+            self._writes += 1
+            if self._writes < max(self.max_entries // 20, 1):
+                return
+            self._writes = 0
+        conn = self._connection()
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        overflow = len(self) - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)", (overflow,)
+            )
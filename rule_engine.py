@@ -0,0 +1,209 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# --- CONFIGURATION ---
+RULES_FILE_PATH = os.environ.get('JOBGUARD_RULES_PATH', 'rules.json')
+RELOAD_CHECK_SECONDS = float(os.environ.get('JOBGUARD_RULES_RELOAD_SECONDS', '2.0'))
+AUTOMATON_MIN_KEYWORDS = int(os.environ.get('JOBGUARD_RULES_AUTOMATON_MIN', '100'))
+
+
+# ---------------------
+
+# ==========================================
+# 1. KEYWORD AUTOMATON
+# ==========================================
+def build_trie_pattern(keywords: List[str]) -> str:
+    """
+    Compiles keywords into one prefix-shared regex (a trie), e.g.
+    ['train', 'training fee', 'telegram'] -> 't(?:elegram|rain(?:ing\\ fee)?)'.
+    The regex engine walks the trie once per text position, so the cost grows
+    with keyword depth instead of keyword count (Aho-Corasick style).
+    """
+    trie: Dict[str, Any] = {}
+    for word in keywords:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Longer continuations are tried first; the bare prefix is the fallback
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(trie)
+
+
+class KeywordScanner:
+    """
+    Finds every keyword present in a text (plain substring semantics, same as
+    `keyword in text`). Large keyword sets are matched in one pass by the trie
+    regex: a lookahead reports the longest keyword starting at every position
+    (overlaps included), and the shorter keywords that are prefixes of it are
+    recovered from a table. Below `AUTOMATON_MIN_KEYWORDS` one C-level `in`
+    test per keyword is still cheaper, so small sets keep doing that.
+    """
+    def __init__(self, keywords: List[str], automaton: Optional[bool] = None):
+        unique = sorted({k for k in keywords if k})
+        self.keywords: FrozenSet[str] = frozenset(unique)
+        self._ordered = unique
+        self.automaton = len(unique) >= AUTOMATON_MIN_KEYWORDS if automaton is None else automaton
+        self._prefixes = {k: [k[:j] for j in range(1, len(k) + 1) if k[:j] in self.keywords] for k in unique}
+        self._regex = re.compile('(?=(' + build_trie_pattern(unique) + '))') if unique else None
+
+    def scan(self, text: str) -> Set[str]:
+        if not self.automaton or self._regex is None:
+            return {k for k in self._ordered if k in text}
+        found: Set[str] = set()
+        for longest in set(self._regex.findall(text)):
+            found.update(self._prefixes[longest])
+        return found
+
+
+# ==========================================
+# 2. RULE SETS
+# ==========================================
+class RuleSet:
+    """
+    One compiled group of rules from the rules file. Each rule is either
+      {"pattern": <regex>, "requires": [...], "message": ...}
+          -> fires if the regex matches; `requires` (optional) lists literals of
+             which at least one must occur for the regex to be able to match
+    or a keyword rule combining
+      {"any": [...]}             -> at least one keyword present
+      {"all": [[...], [...]]}    -> every group has a keyword present
+      {"none": [...]}            -> none of the keywords present
+    All keywords (including `requires` anchors) are matched against the
+    lowercased text by one KeywordScanner; a pattern only runs when one of its
+    anchors was seen, so most postings never touch the proximity regexes.
+    """
+    def __init__(self, name: str, rules: List[Dict[str, Any]], automaton: Optional[bool] = None):
+        self.name = name
+        self.rules = rules
+        self.messages = [rule['message'] for rule in rules]
+
+        keywords: List[str] = []
+        self._conditions: List[Tuple[str, Any]] = []
+        self._patterns: Dict[int, Any] = {}
+        self._requires: Dict[int, FrozenSet[str]] = {}
+        for idx, rule in enumerate(rules):
+            if 'pattern' in rule:
+                self._patterns[idx] = re.compile(rule['pattern'])
+                self._requires[idx] = frozenset(k.lower() for k in rule.get('requires', []))
+                keywords.extend(self._requires[idx])
+                self._conditions.append(('pattern', idx))
+                continue
+            all_groups = [g for g in rule.get('all', [])]
+            if rule.get('any'):
+                all_groups.append(rule['any'])
+            none = rule.get('none', [])
+            if not all_groups and not none:
+                raise ValueError(f"Rule {idx} in '{name}' has no pattern, any, all or none.")
+            for group in all_groups + [none]:
+                keywords.extend(k.lower() for k in group)
+            self._conditions.append(('keywords', (
+                [frozenset(k.lower() for k in group) for group in all_groups],
+                frozenset(k.lower() for k in none),
+            )))
+
+        self.scanner = KeywordScanner(keywords, automaton)
+
+    def match_patterns(self, text_lower: str, found: Set[str]) -> Set[int]:
+        """Indices of the pattern rules that match anywhere in the text."""
+        return {idx for idx, regex in self._patterns.items()
+                if (not self._requires[idx] or not self._requires[idx].isdisjoint(found)) and regex.search(text_lower)}
+
+    def evaluate(self, text: str) -> List[str]:
+        """Messages of every rule that fires on `text`, in file order."""
+        text_lower = text.lower()
+        found = self.scanner.scan(text_lower)
+        patterns = self.match_patterns(text_lower, found)
+
+        fired = []
+        for (kind, condition), message in zip(self._conditions, self.messages):
+            if kind == 'pattern':
+                if condition in patterns:
+                    fired.append(message)
+                continue
+            groups, none = condition
+            if none and not none.isdisjoint(found):
+                continue
+            for group in groups:
+                if group.isdisjoint(found):
+                    break
+            else:
+                fired.append(message)
+        return fired
+
+
+# ==========================================
+# 3. HOT-RELOADING ENGINE
+# ==========================================
+class RuleEngine:
+    """
+    Loads the rule sets from a JSON file and re-compiles them when the file's
+    mtime changes (checked at most every `check_interval` seconds). A broken
+    edit is logged and the previous rules stay active.
+    """
+    def __init__(self, path: str = RULES_FILE_PATH, check_interval: float = RELOAD_CHECK_SECONDS,
+                 log: Optional[Callable[[str, str], None]] = None):
+        self.path = path
+        self.check_interval = check_interval
+        self.log = log or (lambda msg, level="INFO": print(msg))
+        self.rule_sets: Dict[str, RuleSet] = {}
+        self.version = 0
+        self.fingerprint = ""  # mtime of the installed file; identical in every process
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    @staticmethod
+    def compile(data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, RuleSet]:
+        return {name: RuleSet(name, rules) for name, rules in data.items()}
+
+    def reload(self) -> bool:
+        """Re-reads the rules file. Returns True if a new rule set was installed."""
+        with self._lock:
+            mtime = None
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, encoding='utf-8') as f:
+                    rule_sets = self.compile(json.load(f))
+            except (OSError, ValueError, KeyError, re.error) as e:
+                # Remember the broken file's mtime so it is not re-parsed until edited again
+                self._mtime = mtime
+                self.log(f"❌ Rules file {self.path} not loaded: {e}", "ERROR")
+                return False
+            self.rule_sets = rule_sets
+            self._mtime = mtime
+            self.fingerprint = repr(mtime)
+            self.version += 1
+            counts = ", ".join(f"{name}={len(rs.rules)}" for name, rs in rule_sets.items())
+            self.log(f"✅ Rules v{self.version} loaded from {self.path} ({counts})", "SUCCESS")
+            return True
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def evaluate(self, rule_set: str, text: str) -> List[str]:
+        """Runs one named rule set over the text (empty if the set is unknown)."""
+        self._maybe_reload()
+        compiled = self.rule_sets.get(rule_set)
+        return compiled.evaluate(text) if compiled else []
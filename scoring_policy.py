@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# --- CONFIGURATION ---
+SCORING_POLICY_PATH = os.environ.get('JOBGUARD_SCORING_POLICY_PATH', 'scoring_policy.json')
+
+# The ensemble decision as shipped (and the fallback when the policy file is
+# missing or invalid). Rules are tried in order; the first whose `when` holds
+# (and whose `unless` does not) sets the final probability.
+DEFAULT_POLICY: Dict[str, Any] = {
+    "rules": [
+        {"name": "bert_authority", "when": {"bert_gt": 0.85}, "score": "bert",
+         "log": "Logic: BERT Authority", "level": "RESULT"},
+        {"name": "sklearn_override", "when": {"sklearn_gt": 0.80}, "score": "sklearn",
+         "log": "Logic: Sklearn Override", "level": "RESULT"},
+        {"name": "consensus", "when": {"bert_gt": 0.60, "sklearn_gt": 0.60}, "score": "mean",
+         "log": "Logic: Moderate Consensus", "level": "RESULT"},
+        {"name": "sklearn_suspicion", "when": {"sklearn_gt": 0.45}, "score": "max", "floor": 0.45,
+         "log": "Logic: Suspicion Validated -> Force Review Required", "level": "WARN"},
+        {"name": "anomaly_suspicion", "when": {"anomaly_gt": 0.5},
+         "unless": [{"bert_lt": 0.10}, {"bert_lt": 0.20, "sklearn_lt": 0.30}],
+         "score": "max", "floor": 0.45,
+         "log": "Trigger: Anomaly Validated (Models Uncertain) -> Force Review Required", "level": "WARN"},
+        {"name": "clean", "score": "max", "log": "Logic: System Clean", "level": "RESULT"},
+    ],
+    "verdicts": {"fake": 0.50, "review": 0.35},
+}
+
+
+# ---------------------
+
+# ==========================================
+# 1. CONDITIONS & SCORES
+# ==========================================
+SIGNALS = ("bert", "sklearn", "anomaly")  # anomaly: 1.0 if the detector raised alerts, else 0.0
+OPERATORS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "gt": np.greater, "ge": np.greater_equal, "lt": np.less, "le": np.less_equal,
+}
+SCORES: Dict[str, Callable[[Dict[str, np.ndarray]], np.ndarray]] = {
+    "bert": lambda s: s["bert"],
+    "sklearn": lambda s: s["sklearn"],
+    "mean": lambda s: (s["bert"] + s["sklearn"]) / 2,
+    "max": lambda s: np.maximum(s["bert"], s["sklearn"]),
+}
+
+Signals = Dict[str, np.ndarray]
+
+
+def compile_condition(spec: Any) -> Callable[[Signals], np.ndarray]:
+    """
+    Compiles `{"bert_gt": 0.6, "sklearn_gt": 0.6}` (all must hold) or a list of
+    such clauses (any may hold) into a function returning a boolean mask.
+    """
+    clauses = spec if isinstance(spec, list) else [spec]
+    compiled: List[List[Tuple[str, Callable[[np.ndarray, float], np.ndarray], float]]] = []
+    for clause in clauses:
+        terms = []
+        for key, threshold in clause.items():
+            signal, _, op = key.rpartition("_")
+            if signal not in SIGNALS or op not in OPERATORS:
+                raise ValueError(f"Unknown condition '{key}' (expected <{'|'.join(SIGNALS)}>_<{'|'.join(OPERATORS)}>)")
+            terms.append((signal, OPERATORS[op], float(threshold)))
+        compiled.append(terms)
+
+    def mask(signals: Signals) -> np.ndarray:
+        n = len(signals["bert"])
+        out = np.zeros(n, dtype=bool)
+        for terms in compiled:
+            clause_mask = np.ones(n, dtype=bool)
+            for signal, op, threshold in terms:
+                clause_mask &= op(signals[signal], threshold)
+            out |= clause_mask
+        return out
+    return mask
+
+
+class PolicyRule:
+    """One ordered rule of the scoring policy."""
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec["name"]
+        if spec.get("score") not in SCORES:
+            raise ValueError(f"Rule '{self.name}': unknown score '{spec.get('score')}' (expected one of {list(SCORES)})")
+        self.unconditional = "when" not in spec and "unless" not in spec
+        self.when = compile_condition(spec.get("when", {}))
+        self.unless = compile_condition(spec["unless"]) if "unless" in spec else None
+        self.score = SCORES[spec["score"]]
+        self.floor = float(spec["floor"]) if "floor" in spec else None
+        self.log = spec.get("log", f"Logic: {self.name}")
+        self.level = spec.get("level", "RESULT")
+
+
+# ==========================================
+# 2. POLICY
+# ==========================================
+class ScoringPolicy:
+    """
+    The ensemble decision as data: ordered rules over the BERT and Sklearn
+    probabilities and the anomaly flag, evaluated for whole score arrays with
+    NumPy masks (one pass per rule, none per sample). `predict()`, the batch
+    path and the LIME predictor all fuse their scores through the same policy.
+    """
+    def __init__(self, data: Dict[str, Any]):
+        self.rules = [PolicyRule(spec) for spec in data["rules"]]
+        if not self.rules or not self.rules[-1].unconditional:
+            raise ValueError("The last rule must have no `when`/`unless` (it catches every remaining score)")
+        verdicts = data.get("verdicts", DEFAULT_POLICY["verdicts"])
+        self.fake_threshold = float(verdicts["fake"])
+        self.review_threshold = float(verdicts["review"])
+        # Identical in every process; part of the result cache namespace
+        self.fingerprint = hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def load(cls, path: str = SCORING_POLICY_PATH, log: Optional[Callable[[str, str], None]] = None) -> "ScoringPolicy":
+        """Reads the policy file, falling back to `DEFAULT_POLICY` if it is missing or invalid."""
+        log = log or (lambda msg, level="INFO": print(msg))
+        if not os.path.exists(path):
+            return cls(DEFAULT_POLICY)
+        try:
+            with open(path, encoding='utf-8') as f:
+                policy = cls(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log(f"❌ Scoring policy {path} not loaded, using the built-in policy: {e}", "ERROR")
+            return cls(DEFAULT_POLICY)
+        log(f"✅ Scoring policy loaded from {path} ({len(policy.rules)} rules)", "SUCCESS")
+        return policy
+
+    def evaluate(self, bert: Any, sklearn: Any, anomaly: Optional[Any] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fuses score arrays into final fraud probabilities.
+
+        Args:
+            bert (Any): BERT 'Fake' probabilities.
+            sklearn (Any): Sklearn 'Fake' probabilities.
+            anomaly (Optional[Any]): Per sample, whether the anomaly detector raised alerts (default: none did).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The final probabilities, the
+            index of the rule that decided each sample, and a mask of samples where
+            a rule's `when` held but its `unless` overrode it.
+        """
+        bert = np.asarray(bert, dtype=np.float64)
+        signals = {
+            "bert": bert,
+            "sklearn": np.asarray(sklearn, dtype=np.float64),
+            "anomaly": np.zeros_like(bert) if anomaly is None else np.asarray(anomaly, dtype=np.float64),
+        }
+        final = np.zeros_like(bert)
+        decided_by = np.full(len(bert), -1)
+        overridden = np.zeros(len(bert), dtype=bool)
+        undecided = np.ones(len(bert), dtype=bool)
+        for index, rule in enumerate(self.rules):
+            hit = undecided & rule.when(signals)
+            if rule.unless is not None:
+                vetoed = hit & rule.unless(signals)
+                overridden |= vetoed
+                hit &= ~vetoed
+            score = rule.score(signals)
+            if rule.floor is not None:
+                score = np.maximum(score, rule.floor)
+            final[hit] = score[hit]
+            decided_by[hit] = index
+            undecided &= ~hit
+        return final, decided_by, overridden
+
+    def fuse(self, bert: Any, sklearn: Any, anomaly: Optional[Any] = None) -> np.ndarray:
+        """The final fraud probabilities only."""
+        return self.evaluate(bert, sklearn, anomaly)[0]
+
+    def verdicts(self, final: Any) -> np.ndarray:
+        """Maps fused probabilities onto the API verdicts ("Fake", "Review", "Real")."""
+        final = np.asarray(final, dtype=np.float64)
+        return np.where(final > self.fake_threshold, "Fake", np.where(final > self.review_threshold, "Review", "Real"))
@@ -225,7 +225,7 @@ document.addEventListener('DOMContentLoaded', () => {
             fetch('/predict', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ text: text })
+                body: JSON.stringify({ text: text, defer_xai: true })
             })
             .then(res => res.json())
             .then(data => {
@@ -233,6 +233,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 if (data.system_logs) updateLogs(data.system_logs);
                 if (data.error) throw new Error(data.error);
                 displayResult(data);
+                if (data.xai_status === 'pending' && data.xai_job_id) streamXai(data.xai_job_id);
             })
             .catch(err => {
                 loader.classList.add('hidden');
@@ -242,6 +243,22 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Deferred LIME insights arrive over Server-Sent Events once computed
+    function streamXai(jobId) {
+        const source = new EventSource(`/predict/xai/${jobId}/stream`);
+        source.addEventListener('xai', (e) => {
+            source.close();
+            const job = JSON.parse(e.data);
+            const slot = document.getElementById('xaiPending');
+            if (!slot) return;
+            if (!job.xai_insights || job.xai_insights.length === 0) { slot.remove(); return; }
+            slot.classList.remove('blink');
+            slot.innerHTML = "";
+            job.xai_insights.forEach(x => slot.innerHTML += `<span style="background:rgba(255,255,255,0.05); padding:2px 6px; border-radius:4px;">${formatText(x)}</span>`);
+        });
+        source.onerror = () => source.close();
+    }
+
     function displayResult(data) {
         resultContainer.classList.remove('hidden');
         const prob = data.fraud_probability;
@@ -348,7 +365,8 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         // 3. TECHNICAL DETAILS (Anomaly & XAI)
-        if ((data.anomaly_analysis && data.anomaly_analysis.length > 0) || (data.xai_insights && data.xai_insights.length > 0)) {
+        const xaiPending = data.xai_status === 'pending';
+        if ((data.anomaly_analysis && data.anomaly_analysis.length > 0) || (data.xai_insights && data.xai_insights.length > 0) || xaiPending) {
             const techDiv = document.createElement('div'); 
             techDiv.style.marginTop = "20px"; 
             techDiv.style.paddingTop = "10px"; 
@@ -369,6 +387,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 techHtml += `<div style="display:flex; flex-wrap:wrap; gap:10px;">`; 
                 data.xai_insights.forEach(x => techHtml += `<span style="background:rgba(255,255,255,0.05); padding:2px 6px; border-radius:4px;">${formatText(x)}</span>`); 
                 techHtml += `</div>`; 
+            } else if (xaiPending) {
+                techHtml += `<div style="color:var(--neon-purple); margin-top:10px; margin-bottom:5px;">🧠 NEURAL WEIGHTS (LIME):</div>`; 
+                techHtml += `<div id="xaiPending" style="display:flex; flex-wrap:wrap; gap:10px;" class="blink">COMPUTING...</div>`; 
             }
             
             techDiv.innerHTML = techHtml; 
@@ -6,9 +6,12 @@ import os
 from sklearn.base import BaseEstimator, TransformerMixin
 from lime.lime_text import LimeTextExplainer
 
+from rule_engine import RuleEngine
+
 # --- CONFIGURATION ---
 MODEL_FILE_PATH = 'production_fake_job_pipeline.pkl'
 SPACY_MODEL_NAME = 'en_core_web_lg'
+RULES_FILE_PATH = 'rules.json'
 
 
 # ---------------------
@@ -48,38 +51,15 @@ class SpacyVectorTransformer(BaseEstimator, TransformerMixin):
 # ==========================================
 # 2. THE HUMAN REASONING ENGINE 🧠
 # ==========================================
+human_rules = RuleEngine(RULES_FILE_PATH)  # Logic gaps + triggers: 'human_reasoning' in rules.json
+
+
 def explain_like_a_human(text, label, lime_features):
     """
     Translates technical signals into human-readable bullet points.
     """
-    reasons = []
-    text_lower = text.lower()
-
-    # --- 1. LOGIC GAPS (The Detective Layer) ---
-    if "usa" in text_lower or "united states" in text_lower or "california" in text_lower:
-        if "lpa" in text_lower or "rupees" in text_lower:
-            reasons.append("⚠️ **Geography Mismatch:** Location is USA/Global, but salary is in Indian Currency (LPA).")
-
-    if "softwares" in text_lower:
-        reasons.append(
-            "⚠️ **Grammar Red Flag:** Uses 'softwares' (incorrect plural), often a sign of unprofessional scams.")
-
-    if "kindly" in text_lower and "pay" in text_lower:
-        reasons.append("⚠️ **Scam Phrasing:** 'Kindly pay' is a common phrase used in payment fraud.")
-
-    # --- 2. DANGEROUS KEYWORDS (The Trigger Layer) ---
-    triggers = {
-        "telegram": "🚨 **Off-Platform Risk:** Asks to move chat to Telegram (High Fraud Risk).",
-        "whatsapp": "🚨 **Off-Platform Risk:** Asks to move chat to WhatsApp.",
-        "usdt": "💸 **Crypto Risk:** Mentions USDT/Crypto payments (Likely Money Laundering).",
-        "check": "💸 **Payment Risk:** Mentions sending a 'Check' (Likely Mobile Deposit Fraud).",
-        "training fee": "💸 **Upfront Cost:** Asks for money/fees before hiring (Illegal in most places).",
-        "gmail.com": "⚠️ **Generic Email:** Uses a public domain (@gmail) instead of a company email."
-    }
-
-    for word, reason in triggers.items():
-        if word in text_lower:
-            reasons.append(reason)
+    # --- 1. LOGIC GAPS & 2. DANGEROUS KEYWORDS (shared rules file, one scan) ---
+    reasons = human_rules.evaluate('human_reasoning', text)
 
     # --- 3. LIME EXPLAINER (The AI Layer) ---
     # If no specific rules triggered, look at what the AI found suspicious